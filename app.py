@@ -1,16 +1,41 @@
 import os
 import gradio as gr
-import requests
+import http_client
 import re
+from concurrent.futures import ThreadPoolExecutor
 from intent_detection import parse_user_query
 from econ_compute import execute_formula
-from gemini_module import ask_gemini_explainer
+from econ_explain import explain_result
+from gemini_module import ask_gemini_explainer, stream_gemini_explainer, summarize_conversation, new_explainer_session
+from chat_sessions import ChatSessionStore
+from response_cache import ResponseCache
 from data_fetcher_utils import auto_fetch_live_data
 from langdetect import detect
 
 HF_API_TOKEN = os.getenv("HF_API_TOKEN")
+# Lines per translation request; longer answers are split across concurrent requests
+TRANSLATION_BATCH_SIZE = int(os.getenv("ECONOSAGE_TRANSLATION_BATCH", 16))
+TRANSLATION_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="translate")
+STREAM_RESPONSES = os.getenv("ECONOSAGE_STREAM", "1") != "0"
+# Computed results: "off" = LLM explanation only, "template" = step-by-step template only,
+# "template+llm" = template immediately, LLM narrative streamed after it
+FAST_ANSWER = os.getenv("ECONOSAGE_FAST_ANSWER", "off").strip().lower()
 
-chat_session = None
+# One Gemini chat per browser session, bounded in count, idle time and history size
+SESSIONS = ChatSessionStore(
+    start_chat=new_explainer_session,
+    summarize=summarize_conversation,
+    max_sessions=int(os.getenv("ECONOSAGE_MAX_SESSIONS", 1000)),
+    ttl_seconds=float(os.getenv("ECONOSAGE_SESSION_TTL", 3600)),
+    max_history_tokens=int(os.getenv("ECONOSAGE_HISTORY_TOKENS", 4000)),
+)
+
+# Finished answers to first-turn theoretical questions, already translated
+RESPONSES = ResponseCache(
+    max_entries=int(os.getenv("ECONOSAGE_RESPONSE_CACHE_SIZE", 1024)),
+    ttl_seconds=float(os.getenv("ECONOSAGE_RESPONSE_TTL", 86400)),
+)
+TRANSLATION_FALLBACK_NOTE = "couldn't translate the response back"
 
 def translate_to_english(text):
     if not HF_API_TOKEN:
@@ -26,7 +51,7 @@ def translate_to_english(text):
     payload = {"inputs": text}
 
     try:
-        response = requests.post(API_URL, headers=headers, json=payload, timeout=10)
+        response = http_client.post(API_URL, headers=headers, json=payload, timeout=10)
         response.raise_for_status()
         translated = response.json()
         if isinstance(translated, list) and 'translation_text' in translated[0]:
@@ -53,48 +78,141 @@ def is_formula_line(line):
                 return True
     return False
 
+def _translation_text(item):
+    # The API returns one result per input, sometimes wrapped in its own list
+    if isinstance(item, list) and item:
+        item = item[0]
+    if isinstance(item, dict):
+        return item.get('translation_text') or item.get('generated_text')
+    return None
+
+
+def _translate_batch(api_url, headers, segments):
+    """Translate a list of segments in one request; returns the translations in order."""
+    payload = {"inputs": segments, "options": {"wait_for_model": True}}
+    response = http_client.post(api_url, headers=headers, json=payload, timeout=10)
+    response.raise_for_status()
+    translated = response.json()
+    if not isinstance(translated, list) or len(translated) != len(segments):
+        raise ValueError("Unexpected translation response shape")
+    texts = [_translation_text(item) for item in translated]
+    return [text if text is not None else segment for text, segment in zip(texts, segments)]
+
+
 def translate_from_english(text, target_lang_code):
     if not HF_API_TOKEN or target_lang_code == "en":
         return text  # No translation needed or no token
 
     lines = text.split('\n')
-    translated_lines = []
+    translated_lines = list(lines)
 
     model_name = f"Helsinki-NLP/opus-mt-en-{target_lang_code}"
     API_URL = f"https://api-inference.huggingface.co/models/{model_name}"
     headers = {"Authorization": f"Bearer {HF_API_TOKEN}"}
 
-    for line in lines:
-        if line.strip() == "":
-            translated_lines.append(line)
+    # Blank and formula lines stay in place as is; every other line is translated
+    positions = [i for i, line in enumerate(lines) if line.strip() and not is_formula_line(line)]
+    if not positions:
+        return text
+    groups = [positions[i:i + TRANSLATION_BATCH_SIZE] for i in range(0, len(positions), TRANSLATION_BATCH_SIZE)]
+
+    def _run(group):
+        return group, _translate_batch(API_URL, headers, [lines[i] for i in group])
+
+    failed = False
+    futures = [TRANSLATION_POOL.submit(_run, group) for group in groups]
+    for future in futures:
+        try:
+            group, translations = future.result()
+        except Exception:
+            failed = True  # keep these lines in English
             continue
+        for i, translation in zip(group, translations):
+            translated_lines[i] = translation
 
-        if is_formula_line(line):
-            # Preserve formula line as is
-            translated_lines.append(line)
-        else:
-            # Translate this text line
-            payload = {"inputs": line, "options": {"wait_for_model": True}}
-            try:
-                response = requests.post(API_URL, headers=headers, json=payload, timeout=10)
-                response.raise_for_status()
-                translated = response.json()
-                if isinstance(translated, list) and 'translation_text' in translated[0]:
-                    translated_lines.append(translated[0]['translation_text'])
-                elif isinstance(translated, list) and 'generated_text' in translated[0]:
-                    translated_lines.append(translated[0]['generated_text'])
-                else:
-                    translated_lines.append(line)  # fallback to original line
-            except Exception:
-                # Fallback: add notice and original line
-                fallback_msg = ("\n\n(Note: Sorry, I couldn't translate the response back to your language, so here is the answer in English.)")
-                translated_lines.append(line + fallback_msg)
+    result = "\n".join(translated_lines)
+    if failed:
+        result += "\n\n(Note: Sorry, I couldn't translate the response back to your language, so here is the answer in English.)"
+    return result
+
+
+# A sentence is complete at ., ! or ? followed by whitespace, or at a line break
+SENTENCE_END = re.compile(r"[.!?](?=\s)|\n")
+
+
+class StreamTranslator:
+    """
+    Translates streamed English text one completed sentence at a time, so the
+    translated answer can be shown while the model is still generating.
+    """
 
-    return "\n".join(translated_lines)
+    def __init__(self, target_lang_code):
+        self.target_lang_code = target_lang_code
+        self.passthrough = not HF_API_TOKEN or target_lang_code == "en"
+        self.english = ""
+        self.translated = ""
+        self._pending = ""
 
+    def _translate(self, segment):
+        # Keep the whitespace around the segment; the translation API strips it
+        stripped = segment.strip()
+        if not stripped:
+            return segment
+        lead = segment[:len(segment) - len(segment.lstrip())]
+        trail = segment[len(segment.rstrip()):]
+        return lead + translate_from_english(stripped, self.target_lang_code) + trail
 
-def econosage_chat(user_input, history):
-    global chat_session
+    def feed(self, chunk):
+        """Add English text; returns True if the visible text changed."""
+        self.english += chunk
+        if self.passthrough:
+            self.translated += chunk
+            return bool(chunk)
+        self._pending += chunk
+        ends = list(SENTENCE_END.finditer(self._pending))
+        if not ends:
+            return False
+        cut = ends[-1].end()
+        segment, self._pending = self._pending[:cut], self._pending[cut:]
+        self.translated += self._translate(segment)
+        return True
+
+    def flush(self):
+        if self._pending:
+            self.translated += self._translate(self._pending)
+            self._pending = ""
+        return self.translated
+
+
+def explain(session_id, user_question, computed_result=None, formula_used=None):
+    """
+    English response chunks from the explainer; a single chunk when streaming is off.
+    The session's chat is stored back once the chunks have been consumed.
+    """
+    chat_session = SESSIONS.get(session_id)
+    if STREAM_RESPONSES:
+        chunks, chat_session = stream_gemini_explainer(
+            user_question=user_question,
+            computed_result=computed_result,
+            formula_used=formula_used,
+            history_session=chat_session
+        )
+    else:
+        response, chat_session = ask_gemini_explainer(
+            user_question=user_question,
+            computed_result=computed_result,
+            formula_used=formula_used,
+            history_session=chat_session
+        )
+        chunks = [response]
+
+    yield from chunks
+    if chat_session is not None:
+        SESSIONS.put(session_id, chat_session)
+
+
+def econosage_chat(user_input, history, request: gr.Request = None):
+    session_id = getattr(request, "session_hash", None) or "default"
 
     # Step 1: Translate user query to English
     english_input, lang_code = translate_to_english(user_input)
@@ -106,68 +224,84 @@ def econosage_chat(user_input, history):
         detected_lang_code=lang_code
     )
     print(f"Parsed formula: {formula}, params: {params}") 
+    translator = StreamTranslator(lang_code)
+
+    # Without earlier turns the answer depends only on the question, language and region
+    cacheable = is_theoretical and not history and SESSIONS.get(session_id) is None
+    cached = RESPONSES.get(english_input, lang_code, region) if cacheable else None
+
     # Step 3: Handle theoretical/explanatory queries
+    if cached:
+        english, final_response = cached
+        print(f"Cached response for: {english_input}")
+        # Seed the session so follow-up questions still have this exchange as context
+        SESSIONS.put(session_id, new_explainer_session([
+            {"role": "user", "parts": [user_input]},
+            {"role": "model", "parts": [english]},
+        ]))
+        yield final_response
+        return
+
     if is_theoretical:
-        response, chat_session = ask_gemini_explainer(
-            user_question=user_input,
-            history_session=chat_session
-        )
+        chunks = explain(session_id, user_input)
     
     # Step 4: Handle formula-based computational queries
     elif formula:
         try:
             params.setdefault("region", region)
             print(f"Params before live data fetch: {params}")
-            params = auto_fetch_live_data(params)
+            params = auto_fetch_live_data(params, formula=formula)
             print(f"Params after live data fetch: {params}") 
             result, formula_str = execute_formula(formula, params)
 	    
-            response, chat_session = ask_gemini_explainer(
-                user_question=user_input,
-                computed_result=str(result),
-                formula_used=formula_str,
-                history_session=chat_session
-            )
             if "retrieved from" in formula_str.lower():
-                response = f"{formula_str}\n\n{response}"
+                translator.feed(f"{formula_str}\n\n")
+                if translator.translated:
+                    yield translator.translated
+            if FAST_ANSWER in ("template", "template+llm"):
+                translator.feed(explain_result(formula, params, result, formula_str) + "\n\n")
+                yield translator.translated
+            if FAST_ANSWER == "template":
+                chunks = []
+            else:
+                chunks = explain(session_id, user_input, computed_result=str(result), formula_used=formula_str)
 
         except AttributeError as e:
             if "not found" in str(e).lower() or "has no attribute" in str(e).lower():
-                response, chat_session = ask_gemini_explainer(
-                    user_question=user_input,
-                    history_session=chat_session
-                )
+                chunks = explain(session_id, user_input)
             else:
-                response = f"❌ Error: {str(e)}"
+                chunks = [f"❌ Error: {str(e)}"]
 
         except Exception as e:
             error_msg = str(e)
             if "missing" in error_msg and "positional arguments" in error_msg:
-                import re
                 missing_params = re.findall(r"'(\w+)'", error_msg)
                 if missing_params:
                     missing_str = ", ".join(missing_params)
-                    response = (f"Could you please provide the following missing parameter"
-                                f"{'s' if len(missing_params) > 1 else ''}: {missing_str}? "
-                                "Once I have those, I'll be happy to help you with the calculation.")
+                    chunks = [(f"Could you please provide the following missing parameter"
+                               f"{'s' if len(missing_params) > 1 else ''}: {missing_str}? "
+                               "Once I have those, I'll be happy to help you with the calculation.")]
                 else:
-                    response = f"❌ Error during calculation: {error_msg}"
+                    chunks = [f"❌ Error during calculation: {error_msg}"]
             else:
-                response = f"❌ Error during calculation: {error_msg}"
+                chunks = [f"❌ Error during calculation: {error_msg}"]
 
     # Step 5: If Gemini couldn’t map it, still try to explain
     else:
-        response, chat_session = ask_gemini_explainer(
-            user_question=user_input,
-            history_session=chat_session
-        )
+        chunks = explain(session_id, user_input)
 
-    # Step 6: Translate final response back to original language
+    # Step 6: Translate the response back to the original language sentence by sentence
     print(f"Translating from English to {lang_code}")
-    print(f"Original English: {response}")
-    final_response = translate_from_english(response, lang_code)
+    for chunk in chunks:
+        if translator.feed(chunk):
+            yield translator.translated
+    final_response = translator.flush()
+    print(f"Original English: {translator.english}")
     print(f"Hugging Face response: {final_response}")
-    return final_response
+    failed = "❌" in translator.english or "⏳" in translator.english
+    if cacheable and not failed and TRANSLATION_FALLBACK_NOTE not in final_response:
+        RESPONSES.put(english_input, lang_code, region, translator.english, final_response)
+    yield final_response
 
 # Gradio UI setup with polished branding and diverse examples
 chat_interface = gr.ChatInterface(
@@ -0,0 +1,202 @@
+# batch_intent.py
+
+import argparse
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import google.generativeai as genai
+from gemini_module import generation_config, send_message
+from llm_client import BATCH, QueueFullError
+from intent_cache import IntentCache
+from intent_detection import FORMULA_KEYS_LIST, INTENT_CACHE, classify_rephrased
+
+# ----------------------------
+# Batch intent classification for offline query logs
+# ----------------------------
+
+DEFAULT_BATCH_SIZE = 25
+DEFAULT_WORKERS = 4
+# Gives up on a batch after this long waiting for room in the shared LLM queue
+QUEUE_PATIENCE_SECONDS = 600
+
+# One reply line per query can exceed the interactive model's output budget
+batch_model = genai.GenerativeModel(
+    model_name="gemini-1.5-flash",
+    generation_config={**generation_config, "max_output_tokens": 8192},
+)
+
+# Batch replies come from a different prompt, so they are cached apart from the interactive
+# INTENT_CACHE: live chat routing never reads them, and a bad batch reply stays out of it.
+BATCH_INTENT_CACHE = IntentCache(filename="batch_intents.sqlite3", ttl_seconds=INTENT_CACHE.ttl_seconds)
+
+BATCH_PROMPT = """
+You are a finance/economics assistant. For EACH numbered user question below, detect the **intent** and write its reply in ONE of these **three exact formats**:
+
+1️⃣ If it's a theoretical/explanatory question (no formula or API needed):
+THEORETICAL
+
+2️⃣ If it's a computational query requiring a formula:
+FORMULA: <formula_key>: param1 = value1, param2 = value2, ...
+
+3️⃣ If it's a data-fetch request (e.g., stock price, currency rate, inflation):
+DATA_FETCH: <function_key>: param1 = value1, param2 = value2, ...
+
+Use formula or function keys only from this list:
+{keys}
+
+⚠️ Follow strictly:
+- Extract all required parameters from each question.
+- Use correct variable names like P, r, n, t for compound interest.
+- For data fetchers (like stock/currency), detect company name, currency codes, etc.
+- Classify every question independently of the others.
+- Output exactly one line per question and nothing else, as JSON: {{"id": <number>, "reply": "<reply>"}}
+
+Questions:
+{questions}
+"""
+
+_REPLY_LINE = re.compile(r"\{.*\}")
+
+
+def _parse_replies(text: str, count: int) -> dict:
+    """Map item number -> reply for every well-formed line of a batch response."""
+    replies = {}
+    for line in text.splitlines():
+        match = _REPLY_LINE.search(line)
+        if not match:
+            continue
+        try:
+            item = json.loads(match.group(0))
+            number = int(item["id"])
+            reply = str(item["reply"]).strip()
+        except (ValueError, KeyError, TypeError):
+            continue
+        if 1 <= number <= count and reply:
+            replies.setdefault(number, reply)
+    return replies
+
+
+def classify_batch(queries: list) -> list:
+    """
+    Classify several queries with one model request at batch priority.
+    Returns one (intent_type, formula_key, rephrased) per query, or None where the
+    model gave no usable reply for that item.
+    """
+    questions = "\n".join(f"{i}. {' '.join(q.split())}" for i, q in enumerate(queries, 1))
+    prompt = BATCH_PROMPT.format(keys=FORMULA_KEYS_LIST, questions=questions)
+    deadline = time.monotonic() + QUEUE_PATIENCE_SECONDS
+    while True:
+        try:
+            reply = send_message(batch_model.start_chat(history=[]), prompt, priority=BATCH)
+            break
+        except QueueFullError as e:
+            # Interactive traffic has the queue; back off as long as the client suggests
+            if time.monotonic() + e.retry_after > deadline:
+                raise
+            time.sleep(e.retry_after)
+    replies = _parse_replies(reply, len(queries))
+    return [classify_rephrased(replies[i]) if i in replies else None for i in range(1, len(queries) + 1)]
+
+
+def classify_queries(queries, batch_size: int = DEFAULT_BATCH_SIZE, max_workers: int = DEFAULT_WORKERS,
+                     use_cache: bool = True):
+    """
+    Classify many queries, yielding (index, query, result, error) as each batch completes.
+    Repeated queries are sent once and templates cached by live traffic or earlier batches
+    are answered without a request; items missing from a batch reply are retried once in a
+    follow-up batch. New results go to BATCH_INTENT_CACHE only.
+    result is None when error is set.
+    """
+    queries = list(queries)
+    duplicates = {}  # normalized query -> indices of every occurrence
+    for index, query in enumerate(queries):
+        duplicates.setdefault(" ".join(query.lower().split()), []).append(index)
+
+    pending = []  # one representative index per distinct query
+    for indices in duplicates.values():
+        cached = None
+        if use_cache:
+            cached = INTENT_CACHE.get(queries[indices[0]]) or BATCH_INTENT_CACHE.get(queries[indices[0]])
+        if cached is None:
+            pending.append(indices[0])
+            continue
+        for index in indices:
+            yield index, queries[index], cached, None
+
+    def _occurrences(index):
+        return duplicates[" ".join(queries[index].lower().split())]
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="intent-batch") as pool:
+        futures = {}  # future -> (query indices, attempt)
+
+        def _submit(indices, attempt):
+            future = pool.submit(classify_batch, [queries[i] for i in indices])
+            futures[future] = (indices, attempt)
+
+        for start in range(0, len(pending), batch_size):
+            _submit(pending[start:start + batch_size], 1)
+
+        while futures:
+            future = next(as_completed(futures))
+            indices, attempt = futures.pop(future)
+            try:
+                results = future.result()
+            except Exception as e:
+                for index in indices:
+                    for occurrence in _occurrences(index):
+                        yield occurrence, queries[occurrence], None, str(e)
+                continue
+
+            missing = []
+            for index, result in zip(indices, results):
+                if result is None:
+                    missing.append(index)
+                    continue
+                if use_cache:
+                    BATCH_INTENT_CACHE.put(queries[index], result)
+                for occurrence in _occurrences(index):
+                    yield occurrence, queries[occurrence], result, None
+            if missing and attempt == 1:
+                _submit(missing, 2)
+            else:
+                for index in missing:
+                    for occurrence in _occurrences(index):
+                        yield occurrence, queries[occurrence], None, "no reply for this item"
+
+
+def classify_log_file(in_path: str, out_path: str, **options) -> dict:
+    """
+    Classify a query log (one query per line) and append JSON lines to out_path
+    as results arrive. Returns counts of classified and failed queries.
+    """
+    with open(in_path, encoding="utf-8") as f:
+        queries = [line.strip() for line in f if line.strip()]
+
+    counts = {"classified": 0, "failed": 0}
+    with open(out_path, "a", encoding="utf-8") as out:
+        for index, query, result, error in classify_queries(queries, **options):
+            record = {"index": index, "query": query}
+            if error is None:
+                record.update(intent_type=result[0], formula_key=result[1], rephrased=result[2])
+                counts["classified"] += 1
+            else:
+                record["error"] = error
+                counts["failed"] += 1
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classify a log of user queries in batches.")
+    parser.add_argument("queries", help="text file with one query per line")
+    parser.add_argument("output", help="JSON lines file to append results to")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+    print(classify_log_file(
+        args.queries, args.output, batch_size=args.batch_size, max_workers=args.workers,
+        use_cache=not args.no_cache,
+    ))
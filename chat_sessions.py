@@ -0,0 +1,132 @@
+# chat_sessions.py
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# ----------------------------
+# Per-user chat sessions with bounded history
+# ----------------------------
+
+SUMMARY_PREFIX = "Summary of our conversation so far:"
+
+
+def history_messages(chat) -> list:
+    """
+    A chat session's history as [{"role": ..., "parts": [text, ...]}, ...].
+    """
+    return [
+        {"role": content.role, "parts": [part.text for part in content.parts if getattr(part, "text", "")]}
+        for content in chat.history
+    ]
+
+
+def estimate_tokens(messages: list) -> int:
+    # ~4 characters per token is close enough for budgeting
+    return sum(len(text) for message in messages for text in message["parts"]) // 4
+
+
+class _Entry:
+    __slots__ = ("chat", "last_used", "compacting")
+
+    def __init__(self, chat):
+        self.chat = chat
+        self.last_used = time.monotonic()
+        self.compacting = False
+
+
+class ChatSessionStore:
+    """
+    Chat sessions keyed by user session id, evicted least-recently-used beyond
+    max_sessions and after ttl_seconds idle. Once a session's history exceeds
+    max_history_tokens, everything but the pinned opening turns and the most
+    recent turns is folded into a summary in the background, so each request
+    re-sends a roughly constant amount of context.
+    """
+
+    def __init__(self, start_chat, summarize, max_sessions: int = 1000, ttl_seconds: float = 3600,
+                 max_history_tokens: int = 4000, keep_recent_turns: int = 4, pinned_turns: int = 0):
+        # start_chat(history) -> new chat session; summarize(transcript) -> summary text
+        self._start_chat = start_chat
+        self._summarize = summarize
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_history_tokens = max_history_tokens
+        self.keep_recent_turns = keep_recent_turns
+        self.pinned_turns = pinned_turns
+        self._entries = OrderedDict()  # session id -> _Entry
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="session-compact")
+        self.compactions = 0
+
+    def _expire(self):
+        now = time.monotonic()
+        while self._entries:
+            session_id, entry = next(iter(self._entries.items()))
+            if now - entry.last_used < self.ttl_seconds and len(self._entries) <= self.max_sessions:
+                break
+            del self._entries[session_id]
+
+    def get(self, session_id: str):
+        """
+        The chat session for session_id, or None if there is none (or it expired).
+        """
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            entry.last_used = time.monotonic()
+            self._entries.move_to_end(session_id)
+            return entry.chat
+
+    def put(self, session_id: str, chat):
+        """
+        Store the session's chat after a turn and compact its history if it is over budget.
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None or entry.chat is not chat:
+                entry = self._entries[session_id] = _Entry(chat)
+            entry.last_used = time.monotonic()
+            self._entries.move_to_end(session_id)
+            self._expire()
+            if entry.compacting:
+                return
+            messages = history_messages(chat)
+            if estimate_tokens(messages) <= self.max_history_tokens:
+                return
+            entry.compacting = True
+        self._pool.submit(self._compact, session_id, entry, messages)
+
+    def drop(self, session_id: str):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _compact(self, session_id: str, entry: _Entry, messages: list):
+        try:
+            pinned = messages[:2 * self.pinned_turns]
+            recent = messages[2 * self.pinned_turns:][-2 * self.keep_recent_turns:]
+            older = messages[len(pinned):len(messages) - len(recent)]
+            if not older:
+                return
+            transcript = "\n".join(f"{m['role']}: {' '.join(m['parts'])}" for m in older)
+            summary = self._summarize(transcript)
+            history = pinned + [
+                {"role": "user", "parts": [f"{SUMMARY_PREFIX} {summary}"]},
+                {"role": "model", "parts": ["Understood, I'll keep that context in mind."]},
+            ] + recent
+            compacted = self._start_chat(history)
+            with self._lock:
+                # Swap only if no turn was added meanwhile; otherwise the next put retries
+                if self._entries.get(session_id) is entry and len(entry.chat.history) == len(messages):
+                    entry.chat = compacted
+                    self.compactions += 1
+        except Exception as e:
+            print(f"[Warning] Chat history compaction failed for {session_id}: {e}")
+        finally:
+            entry.compacting = False
@@ -9,10 +9,30 @@ Original file is located at
 
 # data_fetcher.py
 
+import os
+import numpy as np
 import yfinance as yf
-import requests
+import http_client
 from babel.numbers import get_territory_currencies
 from datetime import datetime, timedelta
+from fx_rates import FXRateStore, FXHistoryStore
+from indicator_store import IndicatorStore
+from ticker_resolver import TickerResolver, TickerInfo
+from price_history import PriceHistoryCache, COLUMNS as PRICE_COLUMNS, to_day, from_day
+from single_flight import coalesce
+from freshness_cache import serve_stale
+from record_replay import recordable, today_relative_day
+
+# Stale-while-revalidate windows (seconds) for the public fetchers: results younger than the
+# fresh window are served as is, older ones up to the max-stale window are served immediately
+# while refreshing in the background, and anything cached is served when an upstream is down.
+QUOTE_FRESH_SECONDS = float(os.getenv("ECONOSAGE_QUOTE_FRESH_SECONDS", "60"))
+FX_FRESH_SECONDS = float(os.getenv("ECONOSAGE_FX_FRESH_SECONDS", "300"))
+MARKET_MAX_STALE_SECONDS = float(os.getenv("ECONOSAGE_MARKET_MAX_STALE_SECONDS", "86400"))
+HISTORY_FRESH_SECONDS = 3600
+HISTORY_MAX_STALE_SECONDS = 7 * 86400
+INDICATOR_FRESH_SECONDS = 3600
+INDICATOR_MAX_STALE_SECONDS = 30 * 86400
 
 # ----------------------------
 # Currency exchange rate fetcher
@@ -24,26 +44,66 @@ def get_currency_from_region(region_code: str, country: str = None) -> str | Non
     except Exception:
         return None
 
-def get_currency_rate(from_currency: str, to_currency: str, region: str = None) -> float:
+def _fetch_rate_table(base_currency: str) -> dict:
     """
-    Fetch exchange rate from from_currency to to_currency using exchangerate-api.
+    Fetch the full exchange rate table for base_currency from exchangerate-api.
     """
-    api_url = f"https://open.er-api.com/v6/latest/{from_currency.upper()}"
-    response = requests.get(api_url)
+    api_url = f"https://open.er-api.com/v6/latest/{base_currency.upper()}"
+    response = http_client.get(api_url)
     data = response.json()
     if data.get('result') != 'success':
         raise ValueError("Failed to fetch exchange rates")
-    rates = data.get('rates', {})
-    if to_currency.upper() not in rates:
-        raise ValueError(f"Currency {to_currency} not found in rates")
-    return float(rates[to_currency.upper()]), f"Currency Exchange Rate for {from_currency} to {to_currency} retrieved from internet."
+    return data.get('rates', {})
+
+# Shared across the process so repeated and cross-currency lookups reuse fetched tables
+FX_RATES = FXRateStore(
+    fetch_table=_fetch_rate_table,
+    ttl_seconds=float(os.getenv("ECONOSAGE_FX_TTL", "3600")),
+)
 
-def convert_currency(amount: float, from_currency: str, to_currency: str, region: str = None) -> float:
+@serve_stale("open.er-api", FX_FRESH_SECONDS, MARKET_MAX_STALE_SECONDS)
+@coalesce
+def get_currency_rate(from_currency: str, to_currency: str, region: str = None) -> float:
+    """
+    Fetch exchange rate from from_currency to to_currency using exchangerate-api.
+    Served from the process-wide FX table cache; cross rates are derived from held tables.
+    """
+    rate = FX_RATES.get_rate(from_currency, to_currency)
+    return rate, f"Currency Exchange Rate for {from_currency} to {to_currency} retrieved from internet."
+
+@recordable(
+    "fx_history",
+    key=lambda start_day, end_day: [start_day, today_relative_day(end_day)],
+    decode=lambda table: {int(day): rates for day, rates in table.items()},
+)
+def _fetch_fx_history(start_day: int, end_day: int) -> dict:
+    """
+    Fetch ECB daily reference rates (EUR base) for start_day <= day < end_day from Frankfurter.
+    Returns {epoch_day: {currency: rate}}.
+    """
+    start, last = from_day(start_day), from_day(end_day - 1)
+    response = http_client.get(f"https://api.frankfurter.app/{start.isoformat()}..{last.isoformat()}")
+    response.raise_for_status()
+    data = response.json()
+    return {to_day(day): rates for day, rates in data.get("rates", {}).items()}
+
+# Daily history on disk, loaded a year at a time, for date-accurate conversions
+FX_HISTORY = FXHistoryStore(fetch_range=_fetch_fx_history)
+
+def convert_currency(amount: float, from_currency: str, to_currency: str, region: str = None, date: str = None) -> float:
     """
     Convert amount from one currency to another.
+    If date ('YYYY-MM-DD') is given, the rate published on or just before that date is used.
     """
-    rate_result = get_currency_rate(from_currency, to_currency)
-    rate = rate_result[0] if isinstance(rate_result, tuple) else rate_result
+    rate = None
+    if date:
+        try:
+            rate = FX_HISTORY.get_rate(from_currency, to_currency, date)
+        except Exception as e:
+            print(f"[Warning] Historical FX unavailable ({e}); using latest rate")
+    if rate is None:
+        rate_result = get_currency_rate(from_currency, to_currency)
+        rate = rate_result[0] if isinstance(rate_result, tuple) else rate_result
     converted = amount * rate
     return round(converted, 2)
 
@@ -51,10 +111,10 @@ def convert_currency(amount: float, from_currency: str, to_currency: str, region
 # Stock Price Checker
 # ----------------------------
 
-def get_ticker_from_company_name(company_name: str) -> str | None:
+def _search_ticker(company_name: str) -> dict | None:
     """
-    Search Yahoo Finance for ticker symbol from company name.
-    Returns ticker symbol string or None if not found.
+    Query the Yahoo Finance search endpoint and return the top quote, if any.
+    Raises on network or HTTP errors.
     """
     url = "https://query1.finance.yahoo.com/v1/finance/search"
     params = {"q": company_name, "quotesCount": 1, "newsCount": 0}
@@ -68,33 +128,134 @@ def get_ticker_from_company_name(company_name: str) -> str | None:
         "Accept-Language": "en-US,en;q=0.9",
     }
 
-    try:
-        resp = requests.get(url, params=params, headers=headers, timeout=5)
-        resp.raise_for_status()
-        data = resp.json()
+    resp = http_client.get(url, params=params, headers=headers, timeout=5)
+    resp.raise_for_status()
+    data = resp.json()
 
-        if data.get("quotes"):
-            return data["quotes"][0].get("symbol")
+    if data.get("quotes"):
+        return data["quotes"][0]
+    return None
 
+def get_ticker_from_company_name(company_name: str) -> str | None:
+    """
+    Search Yahoo Finance for ticker symbol from company name.
+    Returns ticker symbol string or None if not found.
+    """
+    try:
+        quote = _search_ticker(company_name)
+        if quote:
+            return quote.get("symbol")
     except Exception as e:
         print(f"Error searching ticker for '{company_name}': {e}")
     return None
 
+def _is_missing_ticker(error: Exception) -> bool:
+    """
+    True when Yahoo answered that the symbol does not exist (404 / ticker missing).
+    """
+    if isinstance(error, yf.exceptions.YFTickerMissingError):
+        return True
+    return getattr(getattr(error, "response", None), "status_code", None) == 404
+
+@recordable("yfinance")
+def _ticker_info(ticker_symbol: str) -> dict | None:
+    """
+    Fetch Yahoo Finance info for ticker_symbol, or None if it does not look like a listed ticker.
+    Rate limits, network and server errors propagate: they do not mean the ticker is unknown.
+    """
+    try:
+        info = yf.Ticker(ticker_symbol).info
+    except Exception as e:
+        if _is_missing_ticker(e):
+            return None
+        raise
+    # If info has a regularMarketPrice or currency key, consider it valid
+    if "regularMarketPrice" in info or "currency" in info:
+        return info
+    return None
+
 def is_valid_ticker(ticker_symbol: str) -> bool:
     """
     Checks if the given ticker_symbol exists on Yahoo Finance by trying to fetch info.
     """
     try:
-        ticker = yf.Ticker(ticker_symbol)
-        info = ticker.info
-        # If info has a regularMarketPrice or currency key, consider it valid
-        if "regularMarketPrice" in info or "currency" in info:
-            return True
-        else:
-            return False
+        return _ticker_info(ticker_symbol) is not None
     except Exception:
         return False
 
+def _resolve_ticker_upstream(company_name: str) -> TickerInfo | None:
+    """
+    Resolve a symbol or company name to (ticker, currency, exchange) using Yahoo Finance.
+    Returns None when no ticker exists; search errors propagate so they are not cached.
+    """
+    symbol = company_name.strip().upper()
+    info = _ticker_info(symbol)
+    if info is None:
+        quote = _search_ticker(company_name)
+        if not quote or not quote.get("symbol"):
+            return None
+        symbol = quote["symbol"]
+        info = _ticker_info(symbol) or {}
+        info.setdefault("exchange", quote.get("exchange"))
+    return TickerInfo(symbol, info.get("currency", "USD"), info.get("exchange"))
+
+# Memory LRU in front of a SQLite table shared across workers; misses are cached too
+TICKERS = TickerResolver(
+    resolve_upstream=_resolve_ticker_upstream,
+    ttl_seconds=float(os.getenv("ECONOSAGE_TICKER_TTL_DAYS", "30")) * 86400,
+    negative_ttl_seconds=float(os.getenv("ECONOSAGE_TICKER_NEGATIVE_TTL_HOURS", "24")) * 3600,
+)
+
+@recordable(
+    "yfinance",
+    key=lambda ticker_symbol, start_day, end_day: [ticker_symbol, start_day, today_relative_day(end_day)],
+    encode=lambda bars: [np.asarray(bars[0]).tolist(), np.asarray(bars[1]).tolist()],
+    decode=tuple,
+)
+def _fetch_history(ticker_symbol: str, start_day: int, end_day: int) -> tuple:
+    """
+    Fetch daily OHLCV bars for start_day <= day < end_day (epoch days) from Yahoo Finance.
+    """
+    start = datetime(1970, 1, 1) + timedelta(days=start_day)
+    end = datetime(1970, 1, 1) + timedelta(days=end_day)
+    hist = yf.Ticker(ticker_symbol).history(start=start.strftime("%Y-%m-%d"), end=end.strftime("%Y-%m-%d"))
+    if hist.empty:
+        return [], []
+    index = hist.index.tz_localize(None) if hist.index.tz is not None else hist.index
+    days = index.normalize().values.astype("datetime64[D]").astype("int64")
+    return days, hist[list(PRICE_COLUMNS)].to_numpy(dtype="float64")
+
+# Memory-mapped per-ticker history; each date range is fetched from Yahoo at most once
+PRICE_HISTORY = PriceHistoryCache(fetch_history=_fetch_history)
+
+@serve_stale("yahoo", HISTORY_FRESH_SECONDS, HISTORY_MAX_STALE_SECONDS)
+@coalesce
+def get_stock_history(company_name: str, start_date: str, end_date: str) -> tuple:
+    """
+    Daily OHLCV history for start_date <= day < end_date in the stock's native currency.
+    Returns a columnar dict (date plus one list per OHLCV column) and the source note.
+    """
+    resolved = TICKERS.resolve(company_name)
+    if resolved is None:
+        raise ValueError(f"Could not find ticker symbol for company '{company_name}'")
+    days, rows = PRICE_HISTORY.get_range(resolved.ticker, start_date, end_date)
+    result = {"date": [str(d) for d in days.astype("datetime64[D]")]}
+    for i, column in enumerate(PRICE_COLUMNS):
+        result[column.lower()] = rows[:, i].tolist()
+    return result, f"Price history of {company_name} retrieved from Yahoo Finance in {resolved.currency}."
+
+@recordable("yfinance")
+def _latest_close(ticker_symbol: str) -> float | None:
+    """
+    Latest closing price for ticker_symbol, or None if Yahoo has no recent data.
+    """
+    hist = yf.Ticker(ticker_symbol).history(period="1d")
+    if hist.empty:
+        return None
+    return float(hist['Close'].iloc[0])
+
+@serve_stale("yahoo", QUOTE_FRESH_SECONDS, MARKET_MAX_STALE_SECONDS)
+@coalesce
 def get_stock_price(company_name: str, date: str = None, target_currency: str = "USD", country: str = None, region: str = None) -> float:
     """
     Get stock closing price for a symbol or company name on a given date.
@@ -110,64 +271,237 @@ def get_stock_price(company_name: str, date: str = None, target_currency: str =
             target_currency = local_currency
             print("Target Currency:", target_currency)
 
-    if is_valid_ticker(company_name.upper()):
-        ticker_symbol = company_name.upper()
-    else:
-        ticker_symbol = get_ticker_from_company_name(company_name)
-        if ticker_symbol is None:
-            raise ValueError(f"Could not find ticker symbol for company '{company_name}'")
+    resolved = TICKERS.resolve(company_name)
+    if resolved is None:
+        raise ValueError(f"Could not find ticker symbol for company '{company_name}'")
 
-    ticker = yf.Ticker(ticker_symbol)
-    stock_currency = ticker.info.get('currency', 'USD')
+    ticker_symbol = resolved.ticker
+    stock_currency = resolved.currency or 'USD'
 
     if date:
-        start_date = datetime.strptime(date, "%Y-%m-%d")
-        end_date = start_date + timedelta(days=1)
-        hist = ticker.history(start=start_date.strftime("%Y-%m-%d"), end=end_date.strftime("%Y-%m-%d"))
-        if hist.empty:
+        close = PRICE_HISTORY.get_close(ticker_symbol, date)
+        if close is None:
             raise ValueError(f"No data for {ticker_symbol} on {date}")
-        price = float(hist['Close'].iloc[0])
+        price = close
     else:
-        hist = ticker.history(period="1d")
-        if hist.empty:
+        price = _latest_close(ticker_symbol)
+        if price is None:
             raise ValueError(f"No recent data found for {ticker_symbol}")
-        price = float(hist['Close'].iloc[0])
 
     if stock_currency != target_currency:
         print(f"price:{price}")
-        price = convert_currency(price, stock_currency, target_currency)
+        price = convert_currency(price, stock_currency, target_currency, date=date)
 
     return round(price, 2), f"Stock price of {company_name} retrieved from Yahoo Finance in {target_currency} as of {date or 'today'}."
 
+@recordable("yfinance")
+def _download_closes(ticker_symbols: list, date: str = None) -> dict:
+    """
+    Download closing prices for many tickers in one multi-symbol request.
+    Returns {ticker: close} for tickers that have data.
+    """
+    if date:
+        start_date = datetime.strptime(date, "%Y-%m-%d")
+        end_date = start_date + timedelta(days=1)
+        data = yf.download(
+            ticker_symbols,
+            start=start_date.strftime("%Y-%m-%d"),
+            end=end_date.strftime("%Y-%m-%d"),
+            auto_adjust=True, progress=False, threads=True,
+        )
+    else:
+        # A few days back so every exchange has at least one session in the window
+        data = yf.download(ticker_symbols, period="5d", auto_adjust=True, progress=False, threads=True)
+
+    if data is None or data.empty:
+        return {}
+    closes = data["Close"]
+    if not hasattr(closes, "columns"):  # single ticker without a column level
+        closes = closes.to_frame(name=ticker_symbols[0])
+
+    prices = {}
+    for ticker_symbol in closes.columns:
+        series = closes[ticker_symbol].dropna()
+        if not series.empty:
+            prices[ticker_symbol] = float(series.iloc[0] if date else series.iloc[-1])
+    return prices
+
+@serve_stale("yahoo", QUOTE_FRESH_SECONDS, MARKET_MAX_STALE_SECONDS)
+@coalesce
+def get_stock_prices(symbols: list, date: str = None, target_currency: str = "USD", region: str = None) -> tuple:
+    """
+    Get closing prices for many symbols or company names at once.
+    Tickers are resolved in bulk, closes come from one multi-symbol download and
+    every conversion uses the shared FX table.
+
+    Returns a columnar dict with equal-length lists:
+      symbol, ticker, native_currency, price (in target_currency, None on failure), error
+    """
+    if region:
+        local_currency = get_currency_from_region(region)
+        if local_currency:
+            target_currency = local_currency
+    target_currency = target_currency.upper()
+
+    resolved = TICKERS.resolve_many(symbols)
+    tickers = sorted({info.ticker for info in resolved.values() if isinstance(info, TickerInfo)})
+    closes = _download_closes(tickers, date) if tickers else {}
+
+    result = {"symbol": [], "ticker": [], "native_currency": [], "price": [], "error": []}
+    for symbol in symbols:
+        info = resolved.get(symbol)
+        ticker_symbol = currency = price = error = None
+        if isinstance(info, Exception):
+            error = f"Ticker lookup failed: {info}"
+        elif info is None:
+            error = f"Could not find ticker symbol for company '{symbol}'"
+        else:
+            ticker_symbol, currency = info.ticker, info.currency or "USD"
+            close = closes.get(ticker_symbol)
+            if close is None:
+                error = f"No data for {ticker_symbol} on {date}" if date else f"No recent data found for {ticker_symbol}"
+            else:
+                try:
+                    price = convert_currency(close, currency, target_currency, date=date)
+                except Exception as e:
+                    error = f"Currency conversion failed: {e}"
+        result["symbol"].append(symbol)
+        result["ticker"].append(ticker_symbol)
+        result["native_currency"].append(currency)
+        result["price"].append(price)
+        result["error"].append(error)
+
+    return result, f"Stock prices retrieved from Yahoo Finance in {target_currency} as of {date or 'today'}."
+
 # -----------------------------
 # Inflation rate fetcher (World Bank API)
 # -----------------------------
 
+INFLATION_INDICATOR = "FP.CPI.TOTL.ZG"
+
+WORLD_BANK_API = "http://api.worldbank.org/v2"
+WORLD_BANK_PER_PAGE = 1000
+WORLD_BANK_COUNTRIES_PER_REQUEST = 50
+
+def _iter_indicator_pages(country_codes: list, indicator: str):
+    """
+    Yield each page of World Bank records for one indicator across several countries,
+    using the ';'-joined multi-country syntax and following pagination to the end.
+    """
+    url = f"{WORLD_BANK_API}/country/{';'.join(country_codes)}/indicator/{indicator}"
+    page = 1
+    while True:
+        params = {"format": "json", "per_page": WORLD_BANK_PER_PAGE, "page": page}
+        data = http_client.get(url, params=params).json()
+
+        if not data or len(data) < 2 or data[1] is None:
+            if page == 1:
+                raise ValueError("Invalid response from World Bank API")
+            return
+
+        yield data[1]
+        if page >= int(data[0].get("pages", 1)):
+            return
+        page += 1
+
+def _fetch_indicator_series(country_code: str, indicator: str) -> dict:
+    """
+    Fetch an annual World Bank indicator series as {year: value}.
+    """
+    series = {}
+    for records in _iter_indicator_pages([country_code], indicator):
+        series.update({int(rec['date']): rec['value'] for rec in records if rec['value'] is not None})
+    return series
+
+# Persisted on disk so workers start warm; refreshed on ECONOSAGE_INDICATOR_REFRESH_HOURS
+INDICATORS = IndicatorStore(
+    refresh_seconds=float(os.getenv("ECONOSAGE_INDICATOR_REFRESH_HOURS", "24")) * 3600,
+)
+
+def _get_indicator_value(country_code: str, indicator: str, year: int = None) -> tuple | None:
+    """
+    Read (year, value) from the indicator store, fetching on a cold miss
+    and refreshing stale series in the background.
+    """
+    INDICATORS.start_refresher(_fetch_indicator_series)
+    if INDICATORS.get_series(country_code, indicator) is None:
+        INDICATORS.refresh(country_code, indicator, _fetch_indicator_series)
+    elif INDICATORS.is_stale(country_code, indicator):
+        found = INDICATORS.get_value(country_code, indicator, year)
+        if found is not None:
+            INDICATORS.refresh_in_background(country_code, indicator, _fetch_indicator_series)
+            return found
+        # The requested year may have been published since the last refresh
+        INDICATORS.refresh(country_code, indicator, _fetch_indicator_series)
+    return INDICATORS.get_value(country_code, indicator, year)
+
+@serve_stale("worldbank", INDICATOR_FRESH_SECONDS, INDICATOR_MAX_STALE_SECONDS)
+@coalesce
 def get_inflation_rate(country: str, year: int = None, region: str = None) -> float:
     """
     Fetch inflation rate (% annual change in consumer prices) for given country and year.
     If year is None, returns latest available inflation rate.
+    Served from the local indicator store; World Bank is only hit on cold or stale series.
     """
-    indicator = "FP.CPI.TOTL.ZG"
-    base_url = f"http://api.worldbank.org/v2/country/{region}/indicator/{indicator}?format=json&per_page=100"
-    response = requests.get(base_url)
-    data = response.json()
-
-    if not data or len(data) < 2:
-        raise ValueError("Invalid response from World Bank API")
-
-    records = data[1]
+    country_code = region or country
+    found = _get_indicator_value(country_code, INFLATION_INDICATOR, year)
     if year:
-        year = int(year)
-        for rec in records:
-            if rec['date'] == str(year) and rec['value'] is not None:
-                return float(rec['value']), f"Inflation Rate is retrieved from World bank page for {country}."
-        raise ValueError(f"No inflation data for {country} in {year}")
-    else:
-        for rec in records:
-            if rec['value'] is not None:
-                return float(rec['value'])
+        if found is None:
+            raise ValueError(f"No inflation data for {country} in {year}")
+        return found[1], f"Inflation Rate is retrieved from World bank page for {country}."
+    if found is None:
         raise ValueError(f"No inflation data available for {country}")
+    return found[1]
+
+def get_indicators_bulk(countries: list, indicators: list, start_year: int = None, end_year: int = None) -> dict:
+    """
+    Fetch full series for many countries and indicators in a few paged multi-country
+    requests, refresh the indicator store with them and return dense matrices.
+    Countries the API returns no records for keep (and are served from) their stored series.
+
+    Returns:
+      {"years": [...], "countries": [...],
+       "values": {indicator: numpy array of shape (len(years), len(countries)), NaN where missing}}
+    """
+    countries = [c.strip().upper() for c in countries]
+    collected = {}  # indicator -> {country: {year: value}}
+    for indicator in indicators:
+        by_country = {country: {} for country in countries}
+        for i in range(0, len(countries), WORLD_BANK_COUNTRIES_PER_REQUEST):
+            chunk = countries[i:i + WORLD_BANK_COUNTRIES_PER_REQUEST]
+            for records in _iter_indicator_pages(chunk, indicator):
+                for rec in records:
+                    if rec['value'] is None:
+                        continue
+                    # Records carry ISO2 in country.id and ISO3 in countryiso3code
+                    for code in (rec.get('country', {}).get('id'), rec.get('countryiso3code')):
+                        if code and code.upper() in by_country:
+                            by_country[code.upper()][int(rec['date'])] = rec['value']
+                            break
+        # A country with no records keeps its stored series and is retried on the next call
+        INDICATORS.put_many((country, indicator, series) for country, series in by_country.items() if series)
+        for country, series in by_country.items():
+            if not series:
+                by_country[country] = INDICATORS.get_series(country, indicator) or {}
+        collected[indicator] = by_country
+
+    years = sorted({
+        year
+        for by_country in collected.values()
+        for series in by_country.values()
+        for year in series
+        if (start_year is None or year >= int(start_year)) and (end_year is None or year <= int(end_year))
+    })
+    row = {year: i for i, year in enumerate(years)}
+    values = {}
+    for indicator, by_country in collected.items():
+        matrix = np.full((len(years), len(countries)), np.nan)
+        for j, country in enumerate(countries):
+            for year, value in by_country[country].items():
+                if year in row:
+                    matrix[row[year], j] = value
+        values[indicator] = matrix
+    return {"years": years, "countries": countries, "values": values}
 
 # -----------------------------
 # GST / VAT rates mapping
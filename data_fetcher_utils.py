@@ -1,5 +1,12 @@
 import data_fetcher  # your existing module
-import inspect
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+from formula_inputs import FORMULA_INPUTS
+
+# Overall budget (seconds) for all live fetches made for one computation
+FETCH_DEADLINE = float(os.getenv("ECONOSAGE_FETCH_DEADLINE", "15"))
+
+_fetch_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="live-fetch")
 
 DATA_FETCHER_MAPPING = {
     "get_stock_price": {
@@ -10,7 +17,8 @@ DATA_FETCHER_MAPPING = {
     "get_currency_rate": {
         "func": data_fetcher.get_currency_rate,
         "args": ["from_currency", "to_currency"],
-        "output_param": "currency_rate"
+        "output_param": "currency_rate",
+        "also_fills": ["fx_rate_local"]
     },
     "get_inflation_rate": {
         "func": data_fetcher.get_inflation_rate,
@@ -34,17 +42,74 @@ def _call_data_fetcher(func, params, required_args):
     return func(*func_args)
 
 
-def auto_fetch_live_data(params):
-    updated_params = dict(params)
+def _has_args(params, required_args):
+    return all(arg in params and params[arg] is not None for arg in required_args)
+
+
+def plan_live_fetches(params, formula=None):
+    """
+    Return the DATA_FETCHER_MAPPING keys worth calling for this computation.
+    With a known formula, only fetchers that fill one of its missing inputs are planned;
+    without one, every fetcher whose arguments are present is planned.
+    """
+    if formula in DATA_FETCHER_MAPPING:
+        return []  # execute_formula calls the fetcher itself
+
+    needed = None
+    if formula in FORMULA_INPUTS:
+        needed = {p for p in FORMULA_INPUTS[formula] if params.get(p) is None}
+        if not needed:
+            return []
+
+    plan = []
     for key, fetch_info in DATA_FETCHER_MAPPING.items():
-        func = fetch_info["func"]
-        required_args = fetch_info["args"]
-        output_key = fetch_info["output_param"]
-
-        if all(arg in updated_params and updated_params[arg] is not None for arg in required_args):
-            try:
-                fetched_value = _call_data_fetcher(func, updated_params, required_args)
-                updated_params[output_key] = fetched_value
-            except Exception as e:
-                print(f"[Warning] Data fetch failed for '{key}': {e}")
+        outputs = [fetch_info["output_param"]] + fetch_info.get("also_fills", [])
+        if needed is not None and not needed.intersection(outputs):
+            continue
+        if _has_args(params, fetch_info["args"]):
+            plan.append(key)
+    return plan
+
+
+def auto_fetch_live_data(params, formula=None, deadline=None):
+    """
+    Fetch the live inputs planned for formula concurrently, all under one deadline.
+    Fetch failures and timeouts are reported and leave the parameter unset.
+    """
+    updated_params = dict(params)
+    plan = plan_live_fetches(updated_params, formula)
+    if not plan:
+        return updated_params
+
+    futures = {
+        _fetch_pool.submit(
+            _call_data_fetcher,
+            DATA_FETCHER_MAPPING[key]["func"],
+            updated_params,
+            DATA_FETCHER_MAPPING[key]["args"],
+        ): key
+        for key in plan
+    }
+    done, not_done = wait(futures, timeout=FETCH_DEADLINE if deadline is None else deadline)
+
+    for future in not_done:
+        # Queued fetches are dropped; running ones end within their HTTP timeouts
+        future.cancel()
+        print(f"[Warning] Data fetch timed out for '{futures[future]}'")
+
+    for future in done:
+        key = futures[future]
+        fetch_info = DATA_FETCHER_MAPPING[key]
+        try:
+            fetched_value = future.result()
+        except Exception as e:
+            print(f"[Warning] Data fetch failed for '{key}': {e}")
+            continue
+        # Fetchers return (value, source note); formulas only need the value
+        if isinstance(fetched_value, tuple):
+            fetched_value = fetched_value[0]
+        updated_params[fetch_info["output_param"]] = fetched_value
+        for alias in fetch_info.get("also_fills", []):
+            if updated_params.get(alias) is None:
+                updated_params[alias] = fetched_value
     return updated_params
\ No newline at end of file
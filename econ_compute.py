@@ -3,6 +3,7 @@
 import math
 import inspect
 from data_fetcher import *
+from formula_inputs import FORMULA_INPUTS
 
 # --------------------
 # Core Financial Math
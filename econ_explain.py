@@ -0,0 +1,312 @@
+# econ_explain.py
+
+import math
+import re
+from collections import namedtuple
+from expr_compiler import FUNCTIONS, compile_expr
+
+# ----------------------------
+# Step-by-step explanations of computed results, without the LLM
+# ----------------------------
+
+# name: variable later steps may refer to; label: shown to the user; expr: over inputs and earlier steps
+Step = namedtuple("Step", ["name", "label", "expr"])
+
+TITLES = {
+    "compound_interest": "Compound interest",
+    "principal_from_compound": "Principal from compound amount",
+    "rate_from_compound": "Rate from compound amount",
+    "simple_interest": "Simple interest",
+    "present_value": "Present value",
+    "roi": "Return on investment",
+    "npv": "Net present value",
+    "future_value_annuity": "Future value of an annuity",
+    "sales_tax": "Sales tax",
+    "vat": "VAT",
+    "emi": "EMI",
+    "subsidy_removal_effect": "Subsidy removal effect",
+    "fuel_cost_impact": "Fuel cost impact",
+    "income_tax_slab": "Income tax by slab",
+    "minimum_wage_impact": "Minimum wage impact",
+    "budget_deficit": "Budget deficit",
+    "effective_tax_rate": "Effective tax rate",
+    "public_investment_multiplier": "Public investment multiplier",
+    "weighted_cpi": "Weighted CPI",
+    "inflated_cost": "Inflated cost",
+    "real_value": "Real value",
+    "reverse_inflation": "Implied inflation rate",
+    "inflation_adjusted_salary": "Inflation-adjusted salary",
+    "rule_of_72": "Rule of 72",
+    "real_interest_rate": "Real interest rate",
+    "purchasing_power_loss": "Purchasing power loss",
+    "import_cost_fx": "Import cost after FX move",
+    "capital_flow_score": "Capital flow score",
+    "gdp_growth_from_policy": "GDP growth from fiscal stimulus",
+    "external_debt_burden": "External debt burden",
+    "trade_deficit_growth": "Trade deficit growth",
+    "macro_stress_score": "Macro stress score",
+    "break_even": "Break-even point",
+    "payback_period": "Payback period",
+    "price_elasticity_of_demand": "Price elasticity of demand",
+    "gdp_growth_rate": "GDP growth rate",
+    "debt_to_equity": "Debt to equity",
+    "inventory_turnover": "Inventory turnover",
+    "contribution_margin": "Contribution margin",
+    "operating_profit_margin": "Operating profit margin",
+    "capm": "CAPM expected return",
+    "elasticity_of_supply": "Elasticity of supply",
+    "dscr": "Debt service coverage ratio",
+    "eoq": "Economic order quantity",
+    "wacc": "WACC",
+    "markup_price": "Markup price",
+    "get_stock_price": "Stock price",
+    "get_currency_rate": "Exchange rate",
+    "get_inflation_rate": "Inflation rate",
+    "get_gst_rate": "GST / VAT rate",
+}
+
+# Alternatives per formula; the first whose inputs are all present is used.
+# Formulas without a template (list inputs, slabs, data fetchers) get the generic layout.
+TEMPLATES = {
+    "compound_interest": [[
+        Step("i", "Rate per compounding period", "r / n"),
+        Step("N", "Number of compounding periods", "n * t"),
+        Step("g", "Growth factor", "(1 + i)^N"),
+        Step("A", "Final amount", "P * g"),
+    ]],
+    "principal_from_compound": [[
+        Step("i", "Rate per compounding period", "r / n"),
+        Step("N", "Number of compounding periods", "n * t"),
+        Step("g", "Growth factor", "(1 + i)^N"),
+        Step("P", "Principal", "A / g"),
+    ]],
+    "rate_from_compound": [[
+        Step("ratio", "Growth multiple", "A / P"),
+        Step("N", "Number of compounding periods", "n * t"),
+        Step("rate", "Annual rate", "n * (ratio^(1 / N) - 1)"),
+    ]],
+    "simple_interest": [[
+        Step("I", "Interest", "P * r * t"),
+    ]],
+    "present_value": [[
+        Step("d", "Discount factor", "(1 + r)^t"),
+        Step("PV", "Present value", "FV / d"),
+    ]],
+    "roi": [[
+        Step("profit", "Net gain", "gain - cost"),
+        Step("roi", "ROI", "profit / cost"),
+    ], [
+        Step("A", "Final amount", "P * (1 + r / n)^(n * t)"),
+        Step("roi", "ROI", "(A - P) / P"),
+    ]],
+    "future_value_annuity": [[
+        Step("g", "Growth factor", "(1 + rate_per_period)^periods"),
+        Step("fv", "Future value", "payment * (g - 1) / rate_per_period"),
+    ]],
+    "sales_tax": [[
+        Step("tax", "Tax", "base_price * tax_rate"),
+        Step("final", "Final price", "base_price + tax"),
+    ]],
+    "vat": [[
+        Step("tax", "VAT", "base_price * vat_rate"),
+        Step("final", "Final price", "base_price + tax"),
+    ]],
+    "emi": [[
+        Step("m", "Monthly rate", "annual_rate / 12"),
+        Step("g", "Growth factor", "(1 + m)^months"),
+        Step("emi", "EMI", "principal * m * g / (g - 1)"),
+    ]],
+    "subsidy_removal_effect": [[
+        Step("new_cost", "New cost", "base_cost + subsidy_amount"),
+    ]],
+    "fuel_cost_impact": [[
+        Step("increase", "Cost increase", "price_delta * fuel_share"),
+        Step("new_cost", "New cost", "base_cost + increase"),
+    ]],
+    "minimum_wage_impact": [[
+        Step("gap", "Wage gap", "min_wage - current_wage"),
+        Step("increase", "Wage cost increase", "gap * workforce_pct"),
+    ]],
+    "budget_deficit": [[
+        Step("deficit", "Deficit", "gov_expenditure - gov_revenue"),
+    ]],
+    "effective_tax_rate": [[
+        Step("rate", "Effective rate", "total_tax_paid / total_income"),
+    ]],
+    "public_investment_multiplier": [[
+        Step("multiplier", "Multiplier", "1 / mps"),
+    ]],
+    "inflated_cost": [[
+        Step("g", "Inflation factor", "(1 + inflation_rate)^years"),
+        Step("future", "Future cost", "base_value * g"),
+    ]],
+    "real_value": [[
+        Step("real", "Real value", "nominal_value / (1 + inflation_rate)"),
+    ]],
+    "reverse_inflation": [[
+        Step("ratio", "Price multiple", "future_value / present_value"),
+        Step("rate", "Annual inflation", "ratio^(1 / years) - 1"),
+    ]],
+    "inflation_adjusted_salary": [[
+        Step("g", "Inflation factor", "(1 + inflation_rate)^years"),
+        Step("adjusted", "Adjusted salary", "salary * g"),
+    ]],
+    "rule_of_72": [[
+        Step("pct", "Inflation rate in percent", "inflation_rate * 100"),
+        Step("years", "Years to halve purchasing power", "72 / pct"),
+    ]],
+    "real_interest_rate": [[
+        Step("real", "Real rate", "(1 + nominal_rate) / (1 + inflation_rate) - 1"),
+    ]],
+    "purchasing_power_loss": [[
+        Step("g", "Inflation factor", "(1 + inflation_rate)^years"),
+        Step("kept", "Share of purchasing power kept", "1 / g"),
+        Step("loss", "Loss", "original_price * (1 - kept)"),
+    ]],
+    "import_cost_fx": [[
+        Step("new_cost", "New import cost", "base_cost * (1 + fx_devaluation_pct)"),
+    ]],
+    "capital_flow_score": [[
+        Step("score", "Score", "us_rate_delta * exposure_index"),
+    ]],
+    "gdp_growth_from_policy": [[
+        Step("added", "Output added", "fiscal_stimulus * multiplier"),
+        Step("growth", "Growth in percent", "added / base_gdp * 100"),
+    ]],
+    "external_debt_burden": [[
+        Step("debt_local", "Debt in local currency", "debt_usd * fx_rate_local"),
+        Step("burden", "Debt to GDP", "debt_local / gdp_local"),
+    ]],
+    "trade_deficit_growth": [[
+        Step("change", "Change in deficit", "trade_deficit_current - trade_deficit_previous"),
+        Step("growth", "Growth rate", "change / trade_deficit_previous"),
+    ]],
+    "macro_stress_score": [[
+        Step("score", "Weighted score", "0.5 * fiscal_deficit + 0.3 * inflation_rate + 0.2 * external_debt_ratio"),
+    ]],
+    "break_even": [[
+        Step("margin", "Margin per unit", "price_per_unit - variable_cost_per_unit"),
+        Step("units", "Break-even units", "fixed_costs / margin"),
+    ]],
+    "payback_period": [[
+        Step("period", "Payback period", "initial_investment / annual_cash_inflow"),
+    ]],
+    "price_elasticity_of_demand": [[
+        Step("ped", "Elasticity", "percent_change_quantity / percent_change_price"),
+    ]],
+    "gdp_growth_rate": [[
+        Step("change", "Change in GDP", "gdp_t - gdp_t_minus_1"),
+        Step("growth", "Growth in percent", "change / gdp_t_minus_1 * 100"),
+    ]],
+    "debt_to_equity": [[
+        Step("ratio", "Debt to equity", "total_debt / shareholders_equity"),
+    ]],
+    "inventory_turnover": [[
+        Step("turnover", "Turnover", "cost_of_goods_sold / average_inventory"),
+    ]],
+    "contribution_margin": [[
+        Step("margin", "Contribution margin", "price_per_unit - variable_cost_per_unit"),
+    ]],
+    "operating_profit_margin": [[
+        Step("margin", "Margin in percent", "operating_income / revenue * 100"),
+    ]],
+    "capm": [[
+        Step("premium", "Market risk premium", "market_return - risk_free_rate"),
+        Step("expected", "Expected return", "risk_free_rate + beta * premium"),
+    ]],
+    "elasticity_of_supply": [[
+        Step("elasticity", "Elasticity", "percent_change_quantity_supplied / percent_change_price"),
+    ]],
+    "dscr": [[
+        Step("dscr", "DSCR", "net_operating_income / total_debt_service"),
+    ]],
+    "eoq": [[
+        Step("eoq", "EOQ", "sqrt(2 * demand * ordering_cost / holding_cost)"),
+    ]],
+    "wacc": [[
+        Step("equity_part", "Equity share × cost of equity", "E / V * Re"),
+        Step("debt_part", "Debt share × after-tax cost of debt", "D / V * Rd * (1 - Tc)"),
+        Step("wacc", "WACC", "equity_part + debt_part"),
+    ]],
+    "markup_price": [[
+        Step("markup", "Markup", "cost * markup_percentage"),
+        Step("price", "Price", "cost + markup"),
+    ]],
+}
+
+_NAME = re.compile(r"\b[A-Za-z_]\w*\b")
+
+
+def format_number(value) -> str:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return str(value)
+    if math.isinf(value) or math.isnan(value):
+        return str(value)
+    if value == int(value) and abs(value) < 1e15:
+        return f"{int(value):,}"
+    if abs(value) >= 1:
+        return f"{value:,.4f}".rstrip("0").rstrip(".")
+    return f"{value:.6g}"
+
+
+def _substitute(expr: str, values: dict) -> str:
+    return _NAME.sub(
+        lambda m: m.group(0) if m.group(0) in FUNCTIONS else format_number(values.get(m.group(0), m.group(0))),
+        expr,
+    )
+
+
+def _render_steps(steps: list, params: dict) -> tuple:
+    """Evaluate steps in order; returns (lines, final value)."""
+    values = dict(params)
+    lines = []
+    value = None
+    for i, step in enumerate(steps, 1):
+        compiled = compile_expr(step.expr)
+        value = float(compiled(**{name: values[name] for name in compiled.variables}))
+        lines.append(f"{i}. {step.label}: {step.expr} = {_substitute(step.expr, values)} = {format_number(value)}")
+        values[step.name] = value
+    return lines, value
+
+
+def _matches(value: float, result) -> bool:
+    try:
+        # Results are rounded to 2-4 decimals by econ_compute
+        return math.isclose(value, float(result), rel_tol=1e-3, abs_tol=0.006)
+    except (TypeError, ValueError):
+        return False
+
+
+def _inputs_line(names, params: dict) -> str:
+    return ", ".join(f"{name} = {format_number(params[name])}" for name in names)
+
+
+def explain_result(formula: str, params: dict, result, formula_str: str) -> str:
+    """
+    Step-by-step explanation of a result from econ_compute.execute_formula,
+    with the actual inputs and intermediate values filled in.
+    """
+    title = TITLES.get(formula, formula.replace("_", " ").capitalize())
+    for steps in TEMPLATES.get(formula, []):
+        step_names = {step.name for step in steps}
+        inputs = sorted(
+            {name for step in steps for name in compile_expr(step.expr).variables} - step_names,
+            key=lambda name: list(params).index(name) if name in params else len(params),
+        )
+        if any(not isinstance(params.get(name), (int, float)) for name in inputs):
+            continue
+        try:
+            lines, value = _render_steps(steps, params)
+        except (ArithmeticError, ValueError):
+            continue
+        # Branches the template does not model (e.g. no increase needed) fall through to the generic layout
+        if not _matches(value, result):
+            continue
+        header = [f"**{title}**", f"Formula: {formula_str}", f"Inputs: {_inputs_line(inputs, params)}"]
+        return "  \n".join(header) + "\n\n" + "\n".join(lines) + f"\n\nResult: **{format_number(result)}**"
+
+    given = [name for name, value in params.items() if name != "region" and value is not None]
+    header = [f"**{title}**", f"Formula: {formula_str}"]
+    if given:
+        header.append(f"Inputs: {_inputs_line(given, params)}")
+    return "  \n".join(header) + f"\n\nResult: **{format_number(result)}**"
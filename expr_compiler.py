@@ -0,0 +1,102 @@
+# expr_compiler.py
+
+import ast
+import functools
+import numpy as np
+
+# ----------------------------
+# Whitelisted arithmetic expressions compiled to cached callables
+# ----------------------------
+
+# Functions an expression may call; all work elementwise on NumPy arrays
+FUNCTIONS = {
+    "sqrt": np.sqrt,
+    "exp": np.exp,
+    "log": np.log,
+    "log10": np.log10,
+    "abs": np.abs,
+    "min": np.minimum,
+    "max": np.maximum,
+}
+
+_BIN_OPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.FloorDiv)
+_UNARY_OPS = (ast.UAdd, ast.USub)
+
+
+class ExprError(ValueError):
+    """Raised for expressions outside the whitelist or calls with missing variables."""
+
+
+def _validate(node: ast.AST, names: set):
+    if isinstance(node, ast.Expression):
+        _validate(node.body, names)
+    elif isinstance(node, ast.BinOp) and isinstance(node.op, _BIN_OPS):
+        _validate(node.left, names)
+        _validate(node.right, names)
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, _UNARY_OPS):
+        _validate(node.operand, names)
+    elif isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        pass
+    elif isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+        if node.id.startswith("__"):
+            raise ExprError(f"Unsupported name: {node.id}")
+        if node.id not in FUNCTIONS:
+            names.add(node.id)
+    elif (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+          and node.func.id in FUNCTIONS and not node.keywords):
+        for arg in node.args:
+            _validate(arg, names)
+    else:
+        raise ExprError(f"Unsupported expression element: {type(node).__name__}")
+
+
+class CompiledExpr:
+    """
+    A validated expression compiled once to bytecode. Call it with the variable
+    values as keywords; scalars give a scalar, arrays broadcast elementwise.
+    """
+
+    def __init__(self, expr: str):
+        self.expr = expr
+        try:
+            # Formulas are usually written with ^ for powers
+            tree = ast.parse(expr.strip().replace("^", "**"), mode="eval")
+        except SyntaxError as e:
+            raise ExprError(f"Invalid expression {expr!r}: {e.msg}") from None
+        names = set()
+        _validate(tree, names)
+        self.variables = tuple(sorted(names))
+        self._code = compile(tree, "<expr>", "eval")
+        self._globals = {"__builtins__": {}, **FUNCTIONS}
+
+    def __call__(self, **values):
+        missing = [name for name in self.variables if name not in values]
+        if missing:
+            raise ExprError(f"Missing values for {', '.join(missing)} in {self.expr!r}")
+        scope = {}
+        for name in self.variables:
+            value = values[name]
+            if isinstance(value, (list, tuple, np.ndarray)):
+                value = np.asarray(value, dtype=np.float64)
+            scope[name] = value
+        return eval(self._code, self._globals, scope)
+
+    def grid(self, **values) -> np.ndarray:
+        """
+        Evaluate over every combination of the sequence-valued variables (one axis
+        each, in keyword order); scalar values are held fixed.
+        """
+        axes = [name for name, value in values.items() if np.ndim(value) == 1]
+        meshes = np.ix_(*[np.asarray(values[name], dtype=np.float64) for name in axes])
+        return np.asarray(self(**{**values, **dict(zip(axes, meshes))}), dtype=np.float64)
+
+    def __repr__(self):
+        return f"CompiledExpr({self.expr!r})"
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_expr(expr: str) -> CompiledExpr:
+    """
+    Compile expr once; repeated calls with the same text return the cached callable.
+    """
+    return CompiledExpr(expr)
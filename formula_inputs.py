@@ -0,0 +1,69 @@
+# formula_inputs.py
+
+# ----------------------------
+# Required inputs per formula
+# ----------------------------
+#
+# Kept apart from econ_compute so intent detection and fetch planning can read it
+# without importing the data fetchers. For formulas that accept several input
+# sets, the primary one is listed; tests/test_econ_compute.py checks the table
+# against the formula functions.
+
+FORMULA_INPUTS = {
+    "compound_interest": ("P", "r", "n", "t"),
+    "principal_from_compound": ("A", "r", "n", "t"),
+    "rate_from_compound": ("P", "A", "n", "t"),
+    "simple_interest": ("P", "r", "t"),
+    "present_value": ("FV", "r", "t"),
+    "roi": ("gain", "cost"),
+    "npv": ("discount_rate", "cash_flows"),
+    "future_value_annuity": ("payment", "rate_per_period", "periods"),
+    "sales_tax": ("base_price", "tax_rate"),
+    "vat": ("base_price", "vat_rate"),
+    "emi": ("principal", "annual_rate", "months"),
+    "subsidy_removal_effect": ("base_cost", "subsidy_amount"),
+    "fuel_cost_impact": ("base_cost", "fuel_share", "price_delta"),
+    "income_tax_slab": ("income", "slabs", "rates"),
+    "minimum_wage_impact": ("current_wage", "min_wage", "workforce_pct"),
+    "budget_deficit": ("gov_expenditure", "gov_revenue"),
+    "effective_tax_rate": ("total_tax_paid", "total_income"),
+    "public_investment_multiplier": ("mpc", "mps"),
+    "inflated_cost": ("base_value", "inflation_rate", "years"),
+    "real_value": ("nominal_value", "inflation_rate"),
+    "reverse_inflation": ("present_value", "future_value", "years"),
+    "weighted_cpi": ("weights_dict", "inflation_dict"),
+    "inflation_adjusted_salary": ("salary", "inflation_rate", "years"),
+    "rule_of_72": ("inflation_rate",),
+    "real_interest_rate": ("nominal_rate", "inflation_rate"),
+    "purchasing_power_loss": ("original_price", "inflation_rate", "years"),
+    "import_cost_fx": ("base_cost", "fx_devaluation_pct"),
+    "capital_flow_score": ("us_rate_delta", "exposure_index"),
+    "gdp_growth_from_policy": ("fiscal_stimulus", "multiplier", "base_gdp"),
+    "external_debt_burden": ("debt_usd", "fx_rate_local", "gdp_local"),
+    "trade_deficit_growth": ("trade_deficit_current", "trade_deficit_previous"),
+    "macro_stress_score": ("fiscal_deficit", "inflation_rate", "external_debt_ratio"),
+    "break_even": ("fixed_costs", "price_per_unit", "variable_cost_per_unit"),
+    "payback_period": ("initial_investment", "annual_cash_inflow"),
+    "price_elasticity_of_demand": ("percent_change_quantity", "percent_change_price"),
+    "gdp_growth_rate": ("gdp_t", "gdp_t_minus_1"),
+    "debt_to_equity": ("total_debt", "shareholders_equity"),
+    "inventory_turnover": ("cost_of_goods_sold", "average_inventory"),
+    "contribution_margin": ("price_per_unit", "variable_cost_per_unit"),
+    "operating_profit_margin": ("operating_income", "revenue"),
+    "capm": ("risk_free_rate", "beta", "market_return"),
+    "elasticity_of_supply": ("percent_change_quantity_supplied", "percent_change_price"),
+    "dscr": ("net_operating_income", "total_debt_service"),
+    "eoq": ("demand", "ordering_cost", "holding_cost"),
+    "wacc": ("E", "V", "Re", "D", "Rd", "Tc"),
+    "markup_price": ("cost", "markup_percentage"),
+}
+
+# Inputs the formulas take as fractions (0.05 for 5%) that users usually write as
+# percentages; explicit values above 1 are read as percentages
+FRACTION_INPUTS = frozenset({
+    "r", "rate_per_period", "discount_rate", "risk_free_rate", "market_return",
+    "Re", "Rd", "Tc", "markup_percentage",
+    "tax_rate", "vat_rate", "annual_rate", "nominal_rate", "inflation_rate",
+    "fuel_share", "workforce_pct", "fx_devaluation_pct", "mpc", "mps",
+    "fiscal_deficit", "external_debt_ratio",
+})
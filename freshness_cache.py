@@ -0,0 +1,177 @@
+# freshness_cache.py
+
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from single_flight import call_key
+
+# ----------------------------
+# Stale-while-revalidate serving for live data fetchers
+# ----------------------------
+
+def format_age(seconds: float) -> str:
+    if seconds < 60:
+        return f"{int(seconds)}s"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f} h"
+    return f"{seconds / 86400:.1f} days"
+
+
+def mark_age(result, age_seconds: float):
+    """
+    Append the data age to a fetcher's (value, note) result; other results are returned as is.
+    """
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[1], str):
+        return result[0], f"{result[1]} (cached data, {format_age(age_seconds)} old)"
+    return result
+
+
+def is_upstream_failure(error: Exception) -> bool:
+    # ValueErrors are "no such data" answers unless they wrap an I/O problem
+    return isinstance(error, OSError) or not isinstance(error, ValueError)
+
+
+class _Health:
+    __slots__ = ("failures", "last_failure")
+
+    def __init__(self):
+        self.failures = 0
+        self.last_failure = 0.0
+
+
+class FreshnessCache:
+    """
+    Keeps the last good result of each fetch call and serves it by tier:
+      fresh  (age < fresh_seconds)      returned directly
+      stale  (age < max_stale_seconds)  returned immediately, refreshed in the background
+      older                             fetched synchronously; the old value is served if that fails
+    After failure_threshold consecutive failures an upstream is marked unhealthy for
+    cooldown_seconds, and any cached value is served without contacting it.
+    """
+
+    def __init__(self, max_entries: int = 4096, failure_threshold: int = 3,
+                 cooldown_seconds: float = 30, refresh_workers: int = 4):
+        self.max_entries = max_entries
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._entries = OrderedDict()  # key -> (result, fetched_at)
+        self._health = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="swr-refresh")
+
+    # --- upstream health ---
+
+    def healthy(self, upstream: str) -> bool:
+        with self._lock:
+            health = self._health.get(upstream)
+            if health is None or health.failures < self.failure_threshold:
+                return True
+            return time.monotonic() - health.last_failure >= self.cooldown_seconds
+
+    def _record(self, upstream: str, error: Exception = None):
+        with self._lock:
+            health = self._health.setdefault(upstream, _Health())
+            if error is None:
+                health.failures = 0
+            elif is_upstream_failure(error):
+                health.failures += 1
+                health.last_failure = time.monotonic()
+
+    # --- entries ---
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key, result):
+        with self._lock:
+            self._entries[key] = (result, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def age(self, key) -> float | None:
+        entry = self._get(key)
+        return None if entry is None else time.monotonic() - entry[1]
+
+    def _fetch(self, upstream: str, key, fn, args, kwargs):
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self._record(upstream, e)
+            raise
+        self._record(upstream)
+        self._put(key, result)
+        return result
+
+    def _refresh_in_background(self, upstream: str, key, fn, args, kwargs):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def _run():
+            try:
+                self._fetch(upstream, key, fn, args, kwargs)
+            except Exception as e:
+                print(f"[Warning] Background refresh failed for {upstream}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._pool.submit(_run)
+
+    def call(self, upstream: str, key, fn, args, kwargs, fresh_seconds: float, max_stale_seconds: float):
+        entry = self._get(key)
+        if entry is not None:
+            result, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < fresh_seconds:
+                return result
+            if not self.healthy(upstream):
+                return mark_age(result, age)
+            if age < max_stale_seconds:
+                self._refresh_in_background(upstream, key, fn, args, kwargs)
+                return mark_age(result, age)
+
+        try:
+            return self._fetch(upstream, key, fn, args, kwargs)
+        except Exception as e:
+            if entry is None:
+                raise
+            print(f"[Warning] {upstream} fetch failed, serving cached data: {e}")
+            return mark_age(entry[0], time.monotonic() - entry[1])
+
+
+# Shared by every fetcher in the process
+FRESHNESS = FreshnessCache()
+
+
+def serve_stale(upstream: str, fresh_seconds: float, max_stale_seconds: float, cache: FreshnessCache = None):
+    """
+    Decorator: serve fn through the freshness cache, keyed by its normalized arguments.
+    upstream names the service whose health gates refreshes.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+        freshness = cache or FRESHNESS
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                key = call_key(fn, signature, args, kwargs)
+            except TypeError:
+                return fn(*args, **kwargs)
+            return freshness.call(upstream, key, fn, args, kwargs, fresh_seconds, max_stale_seconds)
+
+        return wrapper
+    return decorator
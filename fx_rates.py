@@ -0,0 +1,237 @@
+# fx_rates.py
+
+import threading
+import time
+from datetime import date as date_cls
+import numpy as np
+import storage
+from price_history import to_day, from_day, merge_ranges, missing_ranges
+from single_flight import SingleFlight
+
+# ----------------------------
+# Process-wide FX rate store
+# ----------------------------
+
+class FXRateStore:
+    """
+    Keeps whole exchange-rate tables (one per base currency) with a TTL and
+    answers any currency pair from a table already held, deriving cross rates
+    through the table's base when the pair is not quoted directly.
+    """
+
+    def __init__(self, fetch_table, ttl_seconds: float = 3600, pivot_currency: str = "USD"):
+        # fetch_table(base) -> {currency_code: rate per 1 unit of base}
+        self._fetch_table = fetch_table
+        self.ttl_seconds = ttl_seconds
+        self.pivot_currency = pivot_currency.upper()
+        self._tables = {}  # base -> (fetched_at, rates)
+        self._lock = threading.Lock()
+        self._fetch_locks = {}
+        self.upstream_calls = 0
+
+    def _fresh_table(self, base: str) -> dict | None:
+        entry = self._tables.get(base)
+        if entry and time.monotonic() - entry[0] < self.ttl_seconds:
+            return entry[1]
+        return None
+
+    def _lookup(self, from_currency: str, to_currency: str) -> float | None:
+        with self._lock:
+            bases = [from_currency] + [b for b in self._tables if b != from_currency]
+            for base in bases:
+                rates = self._fresh_table(base)
+                if not rates:
+                    continue
+                if base == from_currency and to_currency in rates:
+                    return float(rates[to_currency])
+                if from_currency in rates and to_currency in rates and rates[from_currency]:
+                    # Cross rate through this table's base: (base->to) / (base->from)
+                    return float(rates[to_currency]) / float(rates[from_currency])
+        return None
+
+    def get_table(self, base: str) -> dict:
+        """
+        Return the rate table for base, fetching it only if missing or expired.
+        """
+        base = base.upper()
+        with self._lock:
+            rates = self._fresh_table(base)
+            if rates:
+                return rates
+            fetch_lock = self._fetch_locks.setdefault(base, threading.Lock())
+
+        # One upstream call per base at a time; late arrivals reuse its result.
+        with fetch_lock:
+            with self._lock:
+                rates = self._fresh_table(base)
+                if rates:
+                    return rates
+            rates = {code.upper(): float(rate) for code, rate in self._fetch_table(base).items()}
+            rates[base] = 1.0
+            with self._lock:
+                self._tables[base] = (time.monotonic(), rates)
+                self.upstream_calls += 1
+            return rates
+
+    def get_rate(self, from_currency: str, to_currency: str) -> float:
+        """
+        Rate for 1 unit of from_currency in to_currency.
+        Prefers any cached table, then the pivot table, then the from_currency table.
+        """
+        from_currency = from_currency.upper()
+        to_currency = to_currency.upper()
+        if from_currency == to_currency:
+            return 1.0
+
+        rate = self._lookup(from_currency, to_currency)
+        if rate is not None:
+            return rate
+
+        # A single pivot table answers every pair it quotes.
+        self.get_table(self.pivot_currency)
+        rate = self._lookup(from_currency, to_currency)
+        if rate is not None:
+            return rate
+
+        rates = self.get_table(from_currency)
+        if to_currency not in rates:
+            raise ValueError(f"Currency {to_currency} not found in rates")
+        return float(rates[to_currency])
+
+    def invalidate(self, base: str = None):
+        """
+        Drop one cached table, or all of them when base is None.
+        """
+        with self._lock:
+            if base is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(base.upper(), None)
+
+
+# ----------------------------
+# Daily FX history store
+# ----------------------------
+
+class FXHistoryStore:
+    """
+    Daily reference rates against one base currency, stored in SQLite and
+    mirrored in memory as per-currency sorted day/rate arrays. Missing date
+    ranges are loaded a calendar year at a time; lookups use the latest
+    published rate on or before the requested day (weekends, holidays).
+    """
+
+    def __init__(self, fetch_range, base_currency: str = "EUR",
+                 filename: str = "fx_history.sqlite3", max_gap_days: int = 7):
+        # fetch_range(start_day, end_day) -> {epoch_day: {currency: rate per 1 base}}; end exclusive
+        self._fetch_range = fetch_range
+        self.base_currency = base_currency.upper()
+        self.max_gap_days = max_gap_days
+        self._conn = storage.connect(filename)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS rates (
+                currency TEXT NOT NULL,
+                day INTEGER NOT NULL,
+                rate REAL NOT NULL,
+                PRIMARY KEY (currency, day)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS coverage (
+                start_day INTEGER NOT NULL,
+                end_day INTEGER NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+        self._lock = threading.RLock()
+        self._series = {}  # currency -> (days int64[], rates float64[])
+        self._coverage = None
+        self._flights = SingleFlight()
+        self.upstream_calls = 0
+
+    def _load_coverage(self) -> list:
+        if self._coverage is None:
+            rows = self._conn.execute("SELECT start_day, end_day FROM coverage").fetchall()
+            self._coverage = merge_ranges([list(r) for r in rows])
+        return self._coverage
+
+    def _series_for(self, currency: str):
+        series = self._series.get(currency)
+        if series is None:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT day, rate FROM rates WHERE currency = ? ORDER BY day", (currency,)
+                ).fetchall()
+                days = np.array([r[0] for r in rows], dtype=np.int64)
+                rates = np.array([r[1] for r in rows], dtype=np.float64)
+                series = self._series[currency] = (days, rates)
+        return series
+
+    def _gaps(self, start_day: int, end_day: int) -> list:
+        with self._lock:
+            return missing_ranges(self._load_coverage(), start_day, end_day)
+
+    def bulk_load(self, start, end):
+        """
+        Make sure every day in [start, end) is loaded, fetching only uncovered ranges.
+        Concurrent loads of one range share a single fetch, made without holding the store lock.
+        """
+        start_day, end_day = to_day(start), to_day(end)
+        if self._gaps(start_day, end_day):
+            self._flights.do((start_day, end_day), self._load_gaps, start_day, end_day)
+
+    def _load_gaps(self, start_day: int, end_day: int):
+        today = to_day(date_cls.today())
+        # Re-checked here: a load that finished just before this one may have covered the range
+        for gap_start, gap_end in self._gaps(start_day, end_day):
+            table = self._fetch_range(gap_start, gap_end)
+            rows = [
+                (currency.upper(), int(day), float(rate))
+                for day, rates in table.items()
+                for currency, rate in rates.items()
+            ]
+            rows += [(self.base_currency, int(day), 1.0) for day in table]
+            covered_end = min(gap_end, today)  # today's rate may still be published
+            with self._lock:
+                self.upstream_calls += 1
+                with self._conn:
+                    self._conn.executemany("INSERT OR REPLACE INTO rates (currency, day, rate) VALUES (?, ?, ?)", rows)
+                    if gap_start < covered_end:
+                        self._conn.execute(
+                            "INSERT INTO coverage (start_day, end_day) VALUES (?, ?)", (gap_start, covered_end)
+                        )
+                self._coverage = None
+                for currency in {row[0] for row in rows}:
+                    self._series.pop(currency, None)
+
+    def _rate_on(self, currency: str, day: int) -> float | None:
+        if currency == self.base_currency:
+            return 1.0
+        days, rates = self._series_for(currency)
+        i = np.searchsorted(days, day, side="right") - 1
+        if i < 0 or day - days[i] > self.max_gap_days:
+            return None
+        return float(rates[i])
+
+    def get_rate(self, from_currency: str, to_currency: str, day) -> float:
+        """
+        Rate for 1 unit of from_currency in to_currency as published on or just before day.
+        """
+        from_currency, to_currency = from_currency.upper(), to_currency.upper()
+        if from_currency == to_currency:
+            return 1.0
+        target = to_day(day)
+        # Load the whole calendar year (plus the gap window before it) so neighbouring dates need no fetch.
+        # The range stops before today, the first day that never counts as covered; a lookup for
+        # today uses the latest published rate, so warm lookups in the current year fetch nothing.
+        year = from_day(target).year
+        self.bulk_load(
+            to_day(date_cls(year, 1, 1)) - self.max_gap_days,
+            min(to_day(date_cls(year + 1, 1, 1)), to_day(date_cls.today())),
+        )
+
+        from_rate = self._rate_on(from_currency, target)
+        to_rate = self._rate_on(to_currency, target)
+        if from_rate is None or to_rate is None:
+            raise ValueError(f"No historical rate for {from_currency} to {to_currency} on {from_day(target)}")
+        return to_rate / from_rate
@@ -8,7 +8,10 @@ Original file is located at
 """
 
 import google.generativeai as genai
+import math
 import os
+from record_replay import recordable, recordable_stream
+from llm_client import INTERACTIVE, LLMClient, QueueFullError
 
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
@@ -34,6 +37,74 @@ model = genai.GenerativeModel(
     generation_config=generation_config,
 )
 
+# Tutor sessions carry the guideline as a system instruction instead of a bootstrap turn
+explainer_model = genai.GenerativeModel(
+    model_name="gemini-1.5-flash",
+    generation_config=generation_config,
+    system_instruction=TASK_GUIDELINE,
+)
+
+
+def new_explainer_session(history: list = None):
+    """
+    A tutor chat session, optionally seeded with [{"role": ..., "parts": [...]}, ...] history.
+    """
+    return explainer_model.start_chat(history=history or [])
+
+
+def ask_once(prompt: str, priority: int = INTERACTIVE) -> str:
+    """
+    Single-turn prompt on a fresh classifier chat (start_chat is local; no round trip).
+    """
+    return send_message(model.start_chat(history=[]), prompt, priority=priority)
+
+
+# Every Gemini request is paced against the project's quota
+LLM = LLMClient(
+    requests_per_minute=float(os.getenv("ECONOSAGE_LLM_RPM", 60)),
+    tokens_per_minute=float(os.getenv("ECONOSAGE_LLM_TPM", 1_000_000)),
+    max_queue=int(os.getenv("ECONOSAGE_LLM_QUEUE", 100)),
+    max_concurrency=int(os.getenv("ECONOSAGE_LLM_CONCURRENCY", 8)),
+)
+
+# Typical answer length charged up front; explanations rarely use the full max_output_tokens
+EXPECTED_OUTPUT_TOKENS = 300
+
+
+def request_tokens(chat, prompt: str) -> int:
+    """
+    Estimated tokens for sending prompt on chat: its history is re-sent with every message.
+    """
+    history_chars = sum(len(getattr(part, "text", "")) for content in chat.history for part in content.parts)
+    return (history_chars + len(prompt)) // 4 + EXPECTED_OUTPUT_TOKENS
+
+
+def busy_message(error: QueueFullError) -> str:
+    return f"⏳ EconoSage is busy right now. Please try again in about {math.ceil(error.retry_after)} seconds."
+
+
+@recordable("gemini", key=lambda chat, prompt, priority=INTERACTIVE: [prompt])
+def send_message(chat, prompt: str, priority: int = INTERACTIVE) -> str:
+    """
+    Send prompt on a Gemini chat session and return the response text.
+    All model round trips go through here so they can be recorded and replayed.
+    """
+    return LLM.call(chat.send_message, prompt, tokens=request_tokens(chat, prompt), priority=priority).text
+
+
+@recordable_stream("gemini_stream", key=lambda chat, prompt: [prompt])
+def stream_message(chat, prompt: str):
+    """
+    Send prompt on a Gemini chat session and yield the response text chunk by chunk.
+    """
+    with LLM.stream(chat.send_message, prompt, stream=True, tokens=request_tokens(chat, prompt)) as response:
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                continue  # chunk without text parts (e.g. finish metadata)
+            if text:
+                yield text
 
 
 def is_theoretical_question(user_question: str) -> bool:
@@ -49,9 +120,7 @@ def is_theoretical_question(user_question: str) -> bool:
             f"Question: \"{user_question}\""
         )
 
-        classification_chat = model.start_chat(history=[])
-        response = classification_chat.send_message(classification_prompt)
-        answer = response.text.strip().lower()
+        answer = ask_once(classification_prompt).strip().lower()
 
         # Check if answer clearly indicates yes or no
         yes_keywords = {"yes", "yeah", "yep", "y"}
@@ -73,6 +142,41 @@ def is_theoretical_question(user_question: str) -> bool:
         return False
 
 
+def summarize_conversation(transcript: str) -> str:
+    """
+    Condense earlier turns of a tutoring conversation so they can replace the full history.
+    """
+    prompt = (
+        "Summarize the following tutoring conversation in at most 150 words. "
+        "Keep every number, formula, computed result, the user's region and any open question.\n\n"
+        f"{transcript}"
+    )
+    return ask_once(prompt).strip()
+
+
+def _explainer_prompt(user_question: str, computed_result: str = None,
+                      formula_used: str = None, region: str = None) -> str:
+    # Region context injection
+    region_context = ""
+    if region:
+        region_context = f"\nPlease tailor your explanation according to economic/financial practices common in {region}."
+
+    if computed_result and formula_used:
+        return (
+            f"{user_question.strip()}\n\n"
+            f"Note: The final computed result is:\n**{computed_result}**.\n"
+            f"Please explain how this result was calculated using the formula: {formula_used}."
+            + region_context
+            + " Provide a clear, beginner-friendly explanation."
+        )
+    # No precomputed result/formula: Gemini calculates and explains fully
+    return (
+        f"{user_question.strip()}\n\n"
+        "No precomputed result was provided. Please calculate and explain the answer fully, showing the formula and steps."
+        + region_context
+    )
+
+
 def ask_gemini_explainer(
     user_question: str,
     computed_result: str = None,
@@ -96,33 +200,44 @@ def ask_gemini_explainer(
     """
     try:
         if history_session is None:
-            history_session = model.start_chat(history=[])
-            history_session.send_message(TASK_GUIDELINE)
-
-        # Region context injection
-        region_context = ""
-        if region:
-            region_context = f"\nPlease tailor your explanation according to economic/financial practices common in {region}."
-
-        if computed_result and formula_used:
-            full_prompt = (
-                f"{user_question.strip()}\n\n"
-                f"Note: The final computed result is:\n**{computed_result}**.\n"
-                f"Please explain how this result was calculated using the formula: {formula_used}."
-                + region_context
-                + " Provide a clear, beginner-friendly explanation."
-            )
-        else:
-            # No precomputed result/formula: Gemini calculates and explains fully
-            full_prompt = (
-                f"{user_question.strip()}\n\n"
-                "No precomputed result was provided. Please calculate and explain the answer fully, showing the formula and steps."
-                + region_context
-            )
+            history_session = new_explainer_session()
 
-        response = history_session.send_message(full_prompt)
-        return response.text.strip(), history_session
+        full_prompt = _explainer_prompt(user_question, computed_result, formula_used, region)
+        response_text = send_message(history_session, full_prompt)
+        return response_text.strip(), history_session
 
+    except QueueFullError as e:
+        return busy_message(e), history_session
     except Exception as e:
         # You might want to handle specific exceptions differently
-        return f"❌ Error from Gemini API: {str(e)}", history_session
\ No newline at end of file
+        return f"❌ Error from Gemini API: {str(e)}", history_session
+
+
+def stream_gemini_explainer(
+    user_question: str,
+    computed_result: str = None,
+    formula_used: str = None,
+    region: str = None,
+    history_session=None
+) -> tuple[object, object]:
+    """
+    Streaming variant of ask_gemini_explainer.
+
+    Returns:
+    - Tuple: (iterator of response text chunks, updated_history_session)
+      The session's history includes the answer once the iterator is exhausted.
+    """
+    if history_session is None:
+        history_session = new_explainer_session()
+
+    full_prompt = _explainer_prompt(user_question, computed_result, formula_used, region)
+
+    def _chunks():
+        try:
+            yield from stream_message(history_session, full_prompt)
+        except QueueFullError as e:
+            yield busy_message(e)
+        except Exception as e:
+            yield f"\n\n❌ Error from Gemini API: {str(e)}"
+
+    return _chunks(), history_session
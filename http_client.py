@@ -0,0 +1,136 @@
+# http_client.py
+
+import base64
+import os
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from record_replay import recordable
+
+# ----------------------------
+# Shared outbound HTTP layer
+# ----------------------------
+
+# (connect, read) seconds applied to every call that does not pass its own timeout
+DEFAULT_TIMEOUT = (
+    float(os.getenv("ECONOSAGE_HTTP_CONNECT_TIMEOUT", "3.05")),
+    float(os.getenv("ECONOSAGE_HTTP_READ_TIMEOUT", "10")),
+)
+# Total budget for one logical call, retries included
+DEFAULT_DEADLINE = float(os.getenv("ECONOSAGE_HTTP_DEADLINE", "20"))
+DEFAULT_RETRIES = int(os.getenv("ECONOSAGE_HTTP_RETRIES", "2"))
+BACKOFF_BASE = 0.25
+BACKOFF_CAP = 4.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+POOL_MAXSIZE = int(os.getenv("ECONOSAGE_HTTP_POOL_MAXSIZE", "16"))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Process-wide session; its adapter keeps a keep-alive connection pool per host.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=32, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def _backoff(attempt: int, response=None) -> float:
+    """
+    Full-jitter exponential backoff, honouring a numeric Retry-After header.
+    """
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _encode_response(response: requests.Response) -> dict:
+    # Request headers (auth tokens) are never part of a fixture
+    data = {
+        "status_code": response.status_code,
+        "headers": {k: v for k, v in response.headers.items() if k.lower() != "set-cookie"},
+        "url": response.url,
+        "encoding": response.encoding,
+        "reason": response.reason,
+    }
+    # Text bodies are stored as is so fixtures stay readable; anything else as base64
+    try:
+        data["text"] = response.content.decode("utf-8")
+    except UnicodeDecodeError:
+        data["content_b64"] = base64.b64encode(response.content).decode("ascii")
+    return data
+
+
+def _decode_response(data: dict) -> requests.Response:
+    response = requests.Response()
+    response.status_code = data["status_code"]
+    response.headers = CaseInsensitiveDict(data["headers"])
+    if "text" in data:
+        response._content = data["text"].encode("utf-8")
+    else:
+        response._content = base64.b64decode(data["content_b64"])
+    response.url = data["url"]
+    response.encoding = data["encoding"]
+    response.reason = data["reason"]
+    return response
+
+
+@recordable(
+    "http",
+    key=lambda method, url, **kwargs: [method, url, kwargs.get("params"), kwargs.get("json"), kwargs.get("data")],
+    encode=_encode_response,
+    decode=_decode_response,
+)
+def _send(method: str, url: str, **kwargs) -> requests.Response:
+    return get_session().request(method, url, **kwargs)
+
+
+def request(method: str, url: str, retries: int = None, deadline: float = None, **kwargs) -> requests.Response:
+    """
+    Send a request through the shared session with a default timeout and
+    bounded, jittered retries on connection errors, timeouts and 429/5xx.
+    The last response is returned (or the last error raised) once retries
+    or the deadline run out.
+    """
+    retries = DEFAULT_RETRIES if retries is None else retries
+    deadline = DEFAULT_DEADLINE if deadline is None else deadline
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    started = time.monotonic()
+
+    for attempt in range(retries + 1):
+        response, error = None, None
+        try:
+            response = _send(method, url, **kwargs)
+            if response.status_code not in RETRY_STATUSES:
+                return response
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+
+        wait = _backoff(attempt, response)
+        if attempt == retries or time.monotonic() - started + wait >= deadline:
+            if error is not None:
+                raise error
+            return response
+        time.sleep(wait)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
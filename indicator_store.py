@@ -0,0 +1,177 @@
+# indicator_store.py
+
+import threading
+import time
+import storage
+
+# -----------------------------
+# Persistent World Bank indicator store
+# -----------------------------
+
+class IndicatorStore:
+    """
+    On-disk store of annual indicator series keyed by (country, indicator)
+    and indexed by year, with an in-memory mirror for repeat reads.
+    Series older than refresh_seconds are refreshed in the background.
+    """
+
+    def __init__(self, filename: str = "indicators.sqlite3", refresh_seconds: float = 86400):
+        self.refresh_seconds = refresh_seconds
+        self._conn = storage.connect(filename)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS observations (
+                country TEXT NOT NULL,
+                indicator TEXT NOT NULL,
+                year INTEGER NOT NULL,
+                value REAL NOT NULL,
+                PRIMARY KEY (country, indicator, year)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS series (
+                country TEXT NOT NULL,
+                indicator TEXT NOT NULL,
+                refreshed_at REAL NOT NULL,
+                PRIMARY KEY (country, indicator)
+            ) WITHOUT ROWID;
+            """
+        )
+        self._conn.commit()
+        self._lock = threading.RLock()
+        self._memory = {}      # (country, indicator) -> {year: value}
+        self._refreshed = {}   # (country, indicator) -> refreshed_at (unix time)
+        self._refreshing = set()
+        self._refresher = None
+
+    @staticmethod
+    def _key(country: str, indicator: str) -> tuple:
+        return country.strip().upper(), indicator.strip().upper()
+
+    def _load(self, key: tuple) -> dict | None:
+        """Series from memory, falling back to SQLite on first access."""
+        series = self._memory.get(key)
+        if series is not None:
+            return series
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT refreshed_at FROM series WHERE country = ? AND indicator = ?", key
+            ).fetchone()
+            if row is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT year, value FROM observations WHERE country = ? AND indicator = ? ORDER BY year",
+                key,
+            ).fetchall()
+            series = {year: value for year, value in rows}
+            self._memory[key] = series
+            self._refreshed[key] = row[0]
+            return series
+
+    def get_series(self, country: str, indicator: str) -> dict | None:
+        """
+        Return {year: value} for a stored series, or None if never fetched.
+        """
+        return self._load(self._key(country, indicator))
+
+    def get_value(self, country: str, indicator: str, year: int = None) -> tuple | None:
+        """
+        Return (year, value) for the requested year, or the latest available year if year is None.
+        """
+        series = self.get_series(country, indicator)
+        if not series:
+            return None
+        if year is None:
+            latest = max(series)
+            return latest, series[latest]
+        year = int(year)
+        if year in series:
+            return year, series[year]
+        return None
+
+    def put_series(self, country: str, indicator: str, values: dict):
+        """
+        Replace a stored series with values ({year: value}, None values skipped).
+        """
+        self.put_many([(country, indicator, values)])
+
+    def put_many(self, items):
+        """
+        Replace several series, given as (country, indicator, {year: value}), in one transaction.
+        """
+        prepared = []
+        for country, indicator, values in items:
+            key = self._key(country, indicator)
+            prepared.append((key, {int(y): float(v) for y, v in values.items() if v is not None}))
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                for key, series in prepared:
+                    self._conn.execute("DELETE FROM observations WHERE country = ? AND indicator = ?", key)
+                    self._conn.executemany(
+                        "INSERT INTO observations (country, indicator, year, value) VALUES (?, ?, ?, ?)",
+                        [(key[0], key[1], y, v) for y, v in series.items()],
+                    )
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO series (country, indicator, refreshed_at) VALUES (?, ?, ?)",
+                        (key[0], key[1], now),
+                    )
+            for key, series in prepared:
+                self._memory[key] = dict(sorted(series.items()))
+                self._refreshed[key] = now
+
+    def is_stale(self, country: str, indicator: str) -> bool:
+        key = self._key(country, indicator)
+        if self._load(key) is None:
+            return True
+        return time.time() - self._refreshed.get(key, 0) >= self.refresh_seconds
+
+    def refresh(self, country: str, indicator: str, fetch_series):
+        """
+        Fetch a series synchronously with fetch_series(country, indicator) and store it.
+        """
+        self.put_series(country, indicator, fetch_series(country, indicator))
+
+    def refresh_in_background(self, country: str, indicator: str, fetch_series):
+        """
+        Start a refresh thread for one series unless one is already running.
+        """
+        key = self._key(country, indicator)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def _run():
+            try:
+                self.refresh(key[0], key[1], fetch_series)
+            except Exception as e:
+                print(f"[Warning] Indicator refresh failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=_run, daemon=True).start()
+
+    def known_series(self) -> list:
+        with self._lock:
+            return self._conn.execute("SELECT country, indicator FROM series").fetchall()
+
+    def start_refresher(self, fetch_series, interval_seconds: float = None):
+        """
+        Start a daemon thread that periodically refreshes every stale stored series.
+        """
+        if self._refresher is not None:
+            return
+        interval = interval_seconds or self.refresh_seconds
+
+        def _loop():
+            while True:
+                time.sleep(interval)
+                for country, indicator in self.known_series():
+                    if self.is_stale(country, indicator):
+                        try:
+                            self.refresh(country, indicator, fetch_series)
+                        except Exception as e:
+                            print(f"[Warning] Scheduled indicator refresh failed for {country}/{indicator}: {e}")
+
+        self._refresher = threading.Thread(target=_loop, daemon=True)
+        self._refresher.start()
@@ -0,0 +1,164 @@
+# intent_cache.py
+
+import re
+import threading
+import time
+from collections import OrderedDict
+import storage
+
+# ----------------------------
+# Intent classification cache keyed by query template
+# ----------------------------
+
+# Standalone numeric literals; digits inside identifiers (rule_of_72, co2) are left alone
+NUMBER_PATTERN = re.compile(r"(?<![\w.])(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?(?![\w])|(?<![\w.])\.\d+(?![\w])")
+SLOT_PATTERN = re.compile(r"<n(\d+)>")
+
+
+def _number_value(literal: str) -> float:
+    return float(literal.replace(",", ""))
+
+
+def query_template(text: str) -> tuple:
+    """
+    Split a query into (key, numbers): the lower-cased, whitespace-collapsed text
+    with its numbers replaced by <n0>, <n1>, ... and the numbers in order of appearance.
+    """
+    normalized = " ".join(text.strip().lower().split())
+    numbers = []
+
+    def _slot(match):
+        numbers.append(match.group(0).replace(",", ""))
+        return f"<n{len(numbers) - 1}>"
+
+    return NUMBER_PATTERN.sub(_slot, normalized), numbers
+
+
+def make_template(rephrased: str, numbers: list) -> str | None:
+    """
+    Replace every number in rephrased by the slot of the query number it came from.
+    Returns None when a number has no unique source in the query (derived values
+    such as 5% -> 0.05, or repeated values), since the template could not be refilled.
+    """
+    slots = {}
+    for i, literal in enumerate(numbers):
+        slots.setdefault(_number_value(literal), []).append(i)
+
+    unmappable = False
+
+    def _slot(match):
+        nonlocal unmappable
+        sources = slots.get(_number_value(match.group(0)), [])
+        if len(sources) != 1:
+            unmappable = True
+            return match.group(0)
+        return f"<n{sources[0]}>"
+
+    template = NUMBER_PATTERN.sub(_slot, rephrased)
+    if unmappable or SLOT_PATTERN.search(rephrased):
+        return None
+    return template
+
+
+def fill_template(template: str, numbers: list) -> str:
+    return SLOT_PATTERN.sub(lambda m: numbers[int(m.group(1))], template)
+
+
+class IntentCache:
+    """
+    Caches (intent_type, formula_key, rephrased) per query template in an
+    in-memory LRU backed by a SQLite table shared by every worker. Numbers are
+    abstracted out of both the key and the stored rephrasing, so a hit for
+    "P=5000" re-fills the cached rephrasing with the new query's numbers.
+    """
+
+    def __init__(self, filename: str = "intents.sqlite3", max_memory_entries: int = 4096,
+                 ttl_seconds: float = 7 * 86400):
+        self.max_memory_entries = max_memory_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()  # key -> (stored_at, intent_type, formula_key, template)
+        self._lock = threading.Lock()
+        self._conn = storage.connect(filename)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS intents (
+                query TEXT PRIMARY KEY,
+                intent_type TEXT NOT NULL,
+                formula_key TEXT,
+                template TEXT NOT NULL,
+                stored_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, key: str, entry: tuple):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, key: str) -> tuple | None:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                row = self._conn.execute(
+                    "SELECT stored_at, intent_type, formula_key, template FROM intents WHERE query = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                entry = tuple(row)
+            if time.time() - entry[0] >= self.ttl_seconds:
+                self._memory.pop(key, None)
+                return None
+            self._remember(key, entry)
+            return entry
+
+    def get(self, query: str) -> tuple | None:
+        """
+        Return (intent_type, formula_key, rephrased) for query, or None on a miss.
+        """
+        key, numbers = query_template(query)
+        entry = self._lookup(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        _, intent_type, formula_key, template = entry
+        return intent_type, formula_key, fill_template(template, numbers)
+
+    def put(self, query: str, result: tuple) -> bool:
+        """
+        Store a classification result; returns False if its rephrasing cannot be templated.
+        """
+        intent_type, formula_key, rephrased = result
+        key, numbers = query_template(query)
+        template = make_template(rephrased, numbers)
+        if template is None:
+            return False
+        entry = (time.time(), intent_type, formula_key, template)
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO intents (query, intent_type, formula_key, template, stored_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, intent_type, formula_key, template, entry[0]),
+                )
+            self._remember(key, entry)
+        return True
+
+    def invalidate(self, query: str = None):
+        """
+        Drop one query's entry, or every entry when query is None.
+        """
+        with self._lock:
+            with self._conn:
+                if query is None:
+                    self._memory.clear()
+                    self._conn.execute("DELETE FROM intents")
+                else:
+                    key, _ = query_template(query)
+                    self._memory.pop(key, None)
+                    self._conn.execute("DELETE FROM intents WHERE query = ?", (key,))
@@ -7,10 +7,14 @@ Original file is located at
     https://colab.research.google.com/drive/1TiHCbwkMgQJUrBbq2Uq2WwuGftRdSLLd
 """
 
+import os
 import re
-import ast
-import operator as op
-from gemini_module import is_theoretical_question, ask_gemini_explainer, model
+import threading
+from keyword_automaton import KeywordAutomaton
+from formula_inputs import FORMULA_INPUTS, FRACTION_INPUTS
+from intent_cache import IntentCache
+from expr_compiler import compile_expr
+from gemini_module import is_theoretical_question, ask_gemini_explainer, ask_once
 
 
 
@@ -265,6 +269,86 @@ lang_region_map = {
 
 
 
+# Parameters given as percentages; values above 1 are scaled to fractions
+PERCENT_PARAMS = frozenset({
+    "r", "rate_per_period", "discount_rate", "risk_free_rate",
+    "Re", "Rd", "Tc", "markup_percentage",
+    "percent_change_quantity", "percent_change_price",
+    "percent_change_quantity_supplied", "market_return",
+})
+
+
+def _lead_chars(pattern):
+    """
+    Lower-cased characters a pattern's match can start with, read off its
+    leading (?:alt1|alt2|...) group, or None when that cannot be determined.
+    """
+    if not pattern.startswith("(?:"):
+        return None
+    depth, current, alternatives = 0, "", []
+    for i, ch in enumerate(pattern[3:], start=3):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            if depth == 0:
+                alternatives.append(current)
+                if pattern[i + 1:i + 2] in ("?", "*"):
+                    return None  # optional leading group
+                break
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            alternatives.append(current)
+            current = ""
+            continue
+        current += ch
+    if not alternatives or any(not alt or not alt[0].isalnum() for alt in alternatives):
+        return None
+    return {alt[0].lower() for alt in alternatives}
+
+
+def _build_param_scanner(patterns):
+    """
+    Compile PARAM_PATTERNS once into a single-pass scanner.
+    Patterns are merged into one alternation per first character they can
+    match, so each candidate position only tries the patterns that could start
+    there, and only positions where one of them matches are looked at further.
+    There every parameter of the bucket not found yet is tried in
+    PARAM_PATTERNS order, so each keeps its first (leftmost) match even when
+    several parameters match at the same position, as with gdp_t and
+    gdp_t_minus_1. Returns (candidates, scanners, fallback); a scanner is
+    (alternation, ((param, compiled pattern), ...)).
+    """
+    leads = {}
+    compiled = {}
+    for param, pattern in patterns.items():
+        compiled[param] = re.compile(pattern, re.IGNORECASE)
+        if compiled[param].groups != 1:
+            raise ValueError(f"Pattern for '{param}' must have exactly one capture group")
+        leads[param] = _lead_chars(pattern)
+
+    def _bucket(ch):
+        params = [
+            param for param in patterns
+            if leads[param] is None or (ch is not None and ch in leads[param])
+        ]
+        if not params:
+            return None
+        alternation = re.compile("|".join(f"(?:{patterns[param]})" for param in params), re.IGNORECASE)
+        return alternation, tuple((param, compiled[param]) for param in params)
+
+    chars = sorted(set().union(*(l for l in leads.values() if l)))
+    scanners = {ch: _bucket(ch) for ch in chars}
+    fallback = _bucket(None)
+    if fallback is None:
+        candidates = re.compile("[" + re.escape("".join(chars)) + "]", re.IGNORECASE)
+    else:
+        candidates = re.compile(r"(?s:.)")
+    return candidates, scanners, fallback
+
+
+_PARAM_CANDIDATES, _PARAM_SCANNERS, _PARAM_FALLBACK = _build_param_scanner(PARAM_PATTERNS)
+
+
 def extract_params(text):
     if not isinstance(text, str):
         raise ValueError("Input to extract_params must be a string.")
@@ -286,26 +370,33 @@ def extract_params(text):
                 params[key] = val
         return params
 
-    # Standard formula extraction
-    for param, pattern in PARAM_PATTERNS.items():
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
+    # Standard formula extraction: one scan collects every parameter's first match
+    seen = set()
+    for candidate in _PARAM_CANDIDATES.finditer(text):
+        pos = candidate.start()
+        scanner = _PARAM_SCANNERS.get(text[pos].lower(), _PARAM_FALLBACK)
+        if scanner is None or not scanner[0].match(text, pos):
+            continue
+        for param, pattern in scanner[1]:
+            if param in seen:
+                continue
+            match = pattern.match(text, pos)
+            if match is None:
+                continue
+            seen.add(param)
             val = match.group(1)
             if val:
                 try:
                     val_float = float(val)
-                    if param in [
-                        "r", "rate_per_period", "discount_rate", "risk_free_rate",
-                        "Re", "Rd", "Tc", "markup_percentage",
-                        "percent_change_quantity", "percent_change_price",
-                        "percent_change_quantity_supplied", "market_return"
-                    ]:
-                        if val_float > 1:
-                            val_float /= 100
+                    if param in PERCENT_PARAMS and val_float > 1:
+                        val_float /= 100
                     params[param] = val_float
                 except Exception:
                     pass
-    return params
+        if len(seen) == len(PARAM_PATTERNS):
+            break
+    # Same key order as a pass over PARAM_PATTERNS
+    return {param: params[param] for param in PARAM_PATTERNS if param in params}
 
 
 
@@ -313,17 +404,19 @@ def extract_params(text):
 # Region Detection Function
 # -------------------------------
 
+# Built once; a single scan finds every region keyword in the text
+REGION_AUTOMATON = KeywordAutomaton(REGION_KEYWORDS)
+
 def detect_region(user_text, detected_lang_code=None):
     """
-    Detect region from user_text via keywords.
+    Detect region from user_text via keywords (longest match wins).
     Fallback to region via detected language.
     Default is 'US'.
     """
-    text = user_text.lower()
-    for region, keywords in REGION_KEYWORDS.items():
-        if any(kw in text for kw in keywords):
-            return region.upper()
-    
+    region = REGION_AUTOMATON.best(user_text)
+    if region:
+        return region.upper()
+
     if detected_lang_code:
         region = lang_region_map.get(detected_lang_code.lower())
         if region:
@@ -336,13 +429,87 @@ def detect_region(user_text, detected_lang_code=None):
 # Detect Intent from Gemini
 # -------------------------------
 
+# Built once; a single scan finds every intent keyword in the text
+INTENT_AUTOMATON = KeywordAutomaton(INTENT_KEYWORDS)
+
 def detect_intent_from_keywords(text):
-    text = text.lower()
-    for formula, keywords in INTENT_KEYWORDS.items():
-        for kw in keywords:
-            if kw in text:
-                return formula
-    return None
+    """
+    Formula whose keyword best matches text: longest keyword first, then the
+    keyword shared by the fewest formulas, then the earliest occurrence.
+    """
+    return INTENT_AUTOMATON.best(text)
+
+
+# -------------------------------
+# Local Intent Fast Path
+# -------------------------------
+
+LOCAL_INTENT_ENABLED = os.getenv("ECONOSAGE_LOCAL_INTENT", "1") != "0"
+
+# Queries answered by classify_locally vs. sent to Gemini for classification
+INTENT_STATS = {"local": 0, "gemini": 0}
+_intent_stats_lock = threading.Lock()
+
+
+def _count_intent(source: str):
+    with _intent_stats_lock:
+        INTENT_STATS[source] += 1
+
+
+# name = value or name: value, with the name a whole word; "%" marks a percentage
+EXPLICIT_PARAM_PATTERN = re.compile(r"\b([A-Za-z_]\w*)\s*[=:]\s*(\d+(?:\.\d+)?)(\s*%)?(?![\w%]|\.\d)")
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+
+def explicit_params(user_text: str, ignore_spans=()) -> dict | None:
+    """
+    Inputs given as explicit name = value / name: value pairs. Values marked with
+    "%", and values above 1 for rate and share inputs, are scaled to fractions.
+    Returns None when a name is given two different values, or when a number
+    outside those pairs (and outside ignore_spans, e.g. keywords such as
+    "rule of 72") could be an input stated in words.
+    """
+    params, spans = {}, list(ignore_spans)
+    for match in EXPLICIT_PARAM_PATTERN.finditer(user_text):
+        name, value = match.group(1), float(match.group(2))
+        if match.group(3) or (value > 1 and (name in FRACTION_INPUTS or name in PERCENT_PARAMS)):
+            value /= 100
+        if params.get(name, value) != value:
+            return None
+        params[name] = value
+        spans.append((match.start(), match.end()))
+    for number in NUMBER_PATTERN.finditer(user_text):
+        if not any(start <= number.start() and number.end() <= end for start, end in spans):
+            return None
+    return params
+
+
+def classify_locally(user_text: str):
+    """
+    Deterministic formula detection for unambiguous computational queries.
+    Returns (formula, params) when a formula keyword matches, no other computable
+    formula matches equally well, and every required input is given as an explicit
+    name = value pair (see explicit_params); otherwise None, and the query goes to Gemini.
+    """
+    hits = INTENT_AUTOMATON.ranked(user_text)
+    if not hits or hits[0].label not in FORMULA_INPUTS:
+        return None
+
+    keyword_spans = [(hit.start, hit.end) for hit in INTENT_AUTOMATON.find_all(user_text)]
+    params = explicit_params(user_text, keyword_spans)
+    if params is None:
+        return None
+    computable = [
+        hit for hit in hits
+        if hit.label in FORMULA_INPUTS and all(p in params for p in FORMULA_INPUTS[hit.label])
+    ]
+    if not computable or computable[0] is not hits[0]:
+        return None
+    # Two formulas matched by equally long keywords are a guess, not a classification
+    if len(computable) > 1 and len(computable[1].keyword) == len(hits[0].keyword):
+        return None
+    formula = hits[0].label
+    return formula, {name: params[name] for name in FORMULA_INPUTS[formula]}
 
 
 # -------------------------------
@@ -350,29 +517,50 @@ def detect_intent_from_keywords(text):
 # -------------------------------
 
 # Safe evaluation for math expressions
-def safe_eval_expr(expr):
-    operators = {
-        ast.Add: op.add, ast.Sub: op.sub, ast.Mult: op.mul,
-        ast.Div: op.truediv, ast.Pow: op.pow, ast.USub: op.neg
-    }
-
-    def _eval(node):
-        if isinstance(node, ast.Num): return node.n
-        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub): return -_eval(node.operand)
-        elif isinstance(node, ast.BinOp): return operators[type(node.op)](_eval(node.left), _eval(node.right))
-        else: raise ValueError("Unsupported expression")
-
+def safe_eval_expr(expr, **variables):
     try:
-        node = ast.parse(expr, mode='eval').body
-        return _eval(node)
+        return compile_expr(expr)(**variables)
     except Exception:
         return expr  # fallback to raw string
 
 # --- Main function ---
 
+# Built once; the key list only changes with INTENT_KEYWORDS
+FORMULA_KEYS_LIST = ", ".join(INTENT_KEYWORDS.keys())
+
+# Gemini classifications by query template, shared across workers
+INTENT_CACHE = IntentCache(ttl_seconds=float(os.getenv("ECONOSAGE_INTENT_TTL", 7 * 86400)))
+
+
+def classify_rephrased(rephrased: str) -> tuple:
+    """
+    Turn a model reply in one of the three intent formats into (intent_type, formula_key, rephrased).
+    """
+    # Case 1: THEORETICAL
+    if rephrased.lower() == "theoretical":
+        return "theoretical", None, rephrased
+
+    # Case 2 or 3: FORMULA or DATA_FETCH
+    match = re.match(r"(FORMULA|DATA_FETCH):\s*(\w+):", rephrased, re.IGNORECASE)
+    if not match:
+        return "theoretical", None, rephrased
+
+    intent_type = match.group(1).lower()
+    formula_key = match.group(2).lower()
+
+    if formula_key not in INTENT_KEYWORDS:
+        return "theoretical", None, rephrased
+
+    return intent_type, formula_key, rephrased
+
+
 def get_formula_intent_from_gemini(user_question: str):
+    cached = INTENT_CACHE.get(user_question)
+    if cached is not None:
+        print(f"--- Cached intent output:\n{cached[2]}")
+        return cached
+
     try:
-        formula_keys_list = ", ".join(INTENT_KEYWORDS.keys())
         prompt = (
             f"""
 You are a finance/economics assistant. Given a user question, your job is to detect the **intent** and respond in ONE of these **three exact formats**:
@@ -387,7 +575,7 @@ FORMULA: <formula_key>: param1 = value1, param2 = value2, ...
 DATA_FETCH: <function_key>: param1 = value1, param2 = value2, ...
 
 Use formula or function keys only from this list:
-{formula_keys_list}
+{FORMULA_KEYS_LIST}
 
 ⚠️ Follow strictly:
 - Extract all required parameters from the question.
@@ -400,27 +588,12 @@ User Question:
 """
         )
 
-        chat = model.start_chat(history=[])
-        response = chat.send_message(prompt)
-        rephrased = response.text.strip()
+        rephrased = ask_once(prompt).strip()
         print(f"--- Gemini rephrased output:\n{rephrased}")
 
-        # Case 1: THEORETICAL
-        if rephrased.lower() == "theoretical":
-            return "theoretical", None, rephrased
-
-        # Case 2 or 3: FORMULA or DATA_FETCH
-        match = re.match(r"(FORMULA|DATA_FETCH):\s*(\w+):", rephrased, re.IGNORECASE)
-        if not match:
-            return "theoretical", None, rephrased
-
-        intent_type = match.group(1).lower()
-        formula_key = match.group(2).lower()
-
-        if formula_key not in INTENT_KEYWORDS:
-            return "theoretical", None, rephrased
-
-        return intent_type, formula_key, rephrased
+        result = classify_rephrased(rephrased)
+        INTENT_CACHE.put(user_question, result)
+        return result
 
     except Exception as e:
         print(f"⚠️ Error in Gemini rephrase intent: {e}")
@@ -446,7 +619,17 @@ def parse_user_query(user_text: str, detected_lang_code: str | None = None):
      # Step 1: Detect user region from original text & lang code
     region = detect_region(user_text, detected_lang_code)
 
-    # Step 2: Determine formula intent or theoretical using Gemini
+    # Step 2: Unambiguous computational queries are classified locally
+    if LOCAL_INTENT_ENABLED:
+        local = classify_locally(user_text)
+        if local is not None:
+            _count_intent("local")
+            formula, params = local
+            print(f"--- Local intent: {formula} {params}")
+            return False, formula, params, region
+
+    # Step 3: Determine formula intent or theoretical using Gemini
+    _count_intent("gemini")
     intent_type, formula, rephrased = get_formula_intent_from_gemini(user_text)
     if intent_type == "theoretical":
         return True, None, {}, region
@@ -0,0 +1,105 @@
+# keyword_automaton.py
+
+from collections import deque, namedtuple
+
+# -------------------------------
+# Aho-Corasick multi-keyword matcher
+# -------------------------------
+
+KeywordHit = namedtuple("KeywordHit", ["start", "end", "keyword", "label"])
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a {label: [keywords]} catalog.
+    Built once; each scan walks the text a single time and reports every
+    keyword occurrence with its position, however many keywords there are.
+    """
+
+    def __init__(self, catalog: dict):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]        # node -> [(keyword, label)] ending exactly here
+        self._dict_link = [0]   # node -> nearest fail-chain node with output (0 = none)
+        self._label_order = {label: i for i, label in enumerate(catalog)}
+        # A keyword shared by many labels says less about which label is meant
+        self._sharing = {}
+        for keywords in catalog.values():
+            for kw in {k.lower() for k in keywords}:
+                self._sharing[kw] = self._sharing.get(kw, 0) + 1
+
+        for label, keywords in catalog.items():
+            for kw in keywords:
+                self._add(kw.lower(), label)
+        self._link()
+
+    def _add(self, keyword: str, label):
+        node = 0
+        for ch in keyword:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._dict_link.append(0)
+            node = nxt
+        if (keyword, label) not in self._out[node]:
+            self._out[node].append((keyword, label))
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                link = self._fail[child]
+                self._dict_link[child] = link if self._out[link] else self._dict_link[link]
+
+    def find_all(self, text: str) -> list:
+        """
+        Every keyword occurrence in text (lower-cased) as KeywordHit(start, end, keyword, label).
+        """
+        hits = []
+        goto, fail, out, dict_link = self._goto, self._fail, self._out, self._dict_link
+        node = 0
+        for i, ch in enumerate(text.lower()):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            match = node if out[node] else dict_link[node]
+            while match:
+                for keyword, label in out[match]:
+                    hits.append(KeywordHit(i - len(keyword) + 1, i + 1, keyword, label))
+                match = dict_link[match]
+        return hits
+
+    def _rank(self, hit: KeywordHit) -> tuple:
+        # Longest keyword, then most specific, then earliest, then catalog order
+        return (-len(hit.keyword), self._sharing[hit.keyword], hit.start, self._label_order[hit.label])
+
+    def ranked(self, text: str) -> list:
+        """
+        Best hit per label, best label first, as a list of KeywordHit.
+        """
+        best = {}
+        for hit in self.find_all(text):
+            current = best.get(hit.label)
+            if current is None or self._rank(hit) < self._rank(current):
+                best[hit.label] = hit
+        return sorted(best.values(), key=self._rank)
+
+    def best(self, text: str):
+        """
+        Label of the best hit in text, or None when no keyword occurs.
+        """
+        hits = self.find_all(text)
+        if not hits:
+            return None
+        return min(hits, key=self._rank).label
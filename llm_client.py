@@ -0,0 +1,311 @@
+# llm_client.py
+
+import asyncio
+import functools
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# ----------------------------
+# Rate-limited LLM request scheduler
+# ----------------------------
+
+INTERACTIVE = 0
+BATCH = 1
+
+
+class QueueFullError(RuntimeError):
+    """Raised immediately when the wait queue is full; retry_after estimates when to try again."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"LLM request queue is full, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+def is_quota_error(error: Exception) -> bool:
+    # google.api_core.exceptions.ResourceExhausted carries code 429
+    return getattr(error, "code", None) == 429 or type(error).__name__ in ("ResourceExhausted", "TooManyRequests")
+
+
+class TokenBucket:
+    """
+    Refills at rate_per_minute, holding at most burst_seconds worth of capacity.
+    Requests larger than the capacity are let through when the bucket is full
+    and leave it in debt, so they are still paced at the long-run rate.
+    """
+
+    def __init__(self, rate_per_minute: float, burst_seconds: float = 10):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        self._refill()
+        needed = min(amount, self.capacity)
+        return 0.0 if self.level >= needed else (needed - self.level) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= amount
+
+    def drain(self):
+        self._refill()
+        self.level = min(self.level, 0.0)
+
+
+class _Request:
+    __slots__ = ("fn", "tokens", "priority", "future", "attempts", "stream")
+
+    def __init__(self, fn, tokens: int, priority: int, stream: bool = False):
+        self.fn = fn
+        self.tokens = tokens
+        self.priority = priority
+        self.future = Future()
+        self.attempts = 0
+        self.stream = stream
+
+
+def _open_stream(fn):
+    """
+    Start a streamed call and read its first chunk, so errors raised before any
+    output (quota errors in particular) surface inside the scheduled call.
+    """
+    iterator = iter(fn())
+    try:
+        return iterator, [next(iterator)]
+    except StopIteration:
+        return iterator, []
+
+
+class HeldStream:
+    """
+    Iterator over a streamed response that keeps its scheduler slot until the
+    stream is exhausted, fails or is closed (also on garbage collection).
+    """
+
+    def __init__(self, iterator, head: list, release):
+        self._iterator = iterator
+        self._head = head
+        self._release = release
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._head:
+            return self._head.pop(0)
+        if self._closed:
+            raise StopIteration
+        try:
+            return next(self._iterator)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        try:
+            close = getattr(self._iterator, "close", None)
+            if close is not None:
+                close()
+        finally:
+            self._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+
+class LLMClient:
+    """
+    Schedules blocking LLM calls on an asyncio loop running in a background thread.
+    Calls wait in one bounded priority queue (interactive before batch) and are
+    released only when both the requests/min and tokens/min buckets allow it.
+    A full queue fails fast with QueueFullError; quota errors from the upstream
+    drain the request bucket and are retried up to max_retries times.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, max_queue: int = 100,
+                 max_concurrency: int = 8, max_retries: int = 3, batch_share: float = 0.8):
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self.max_queue = max_queue
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        # Batch traffic may fill only part of the queue, leaving room for interactive calls
+        self.batch_limit = max(1, int(max_queue * batch_share))
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._pending_tokens = 0
+        self._heap = []
+        self._seq = itertools.count()
+        self._active = 0
+        self._loop = None
+        self._wakeup = None
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm-call")
+        self.completed = 0
+        self.rejected = 0
+        self.quota_retries = 0
+
+    # --- event loop thread ---
+
+    def _ensure_started(self):
+        if self._loop is not None:
+            return
+        with self._lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _run():
+                asyncio.set_event_loop(loop)
+                self._wakeup = asyncio.Event()
+                loop.create_task(self._dispatch())
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            threading.Thread(target=_run, name="llm-scheduler", daemon=True).start()
+            ready.wait()
+            self._loop = loop
+
+    def _push(self, request: _Request):
+        heapq.heappush(self._heap, (request.priority, next(self._seq), request))
+        self._wakeup.set()
+
+    async def _dispatch(self):
+        while True:
+            if not self._heap or self._active >= self.max_concurrency:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            request = self._heap[0][2]
+            wait = max(self._requests.wait_time(1), self._tokens.wait_time(request.tokens))
+            if wait > 0:
+                # Wake early if something with higher priority arrives
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._heap)
+            self._requests.take(1)
+            self._tokens.take(request.tokens)
+            self._active += 1
+            asyncio.get_running_loop().create_task(self._run(request))
+            del request  # an abandoned stream must not stay alive here until the next dispatch
+
+    async def _run(self, request: _Request):
+        request.attempts += 1
+        retry = False
+        held = False
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._pool, request.fn)
+        except Exception as e:
+            if is_quota_error(e) and request.attempts <= self.max_retries:
+                self._requests.drain()
+                self.quota_retries += 1
+                retry = True
+            else:
+                self._finish(request.tokens)
+                request.future.set_exception(e)
+        else:
+            if request.stream:
+                # The slot and the pending accounting stay taken while the caller reads the stream
+                held = True
+                iterator, head = result
+                # (bound to the token count only: the stream must not keep its own future alive)
+                request.future.set_result(HeldStream(iterator, head, functools.partial(self._release, request.tokens)))
+            else:
+                self._finish(request.tokens)
+                request.future.set_result(result)
+        finally:
+            if not held:
+                self._active -= 1
+            if retry:
+                self._push(request)
+            self._wakeup.set()
+
+    def _release(self, tokens: int):
+        """Free the slot of a finished stream; safe to call from any thread."""
+        self._finish(tokens)
+        self._loop.call_soon_threadsafe(self._free_slot)
+
+    def _free_slot(self):
+        self._active -= 1
+        self._wakeup.set()
+
+    def _finish(self, tokens: int):
+        with self._lock:
+            self._pending -= 1
+            self._pending_tokens -= tokens
+            self.completed += 1
+
+    # --- caller side ---
+
+    def retry_after(self) -> float:
+        with self._lock:
+            return self._retry_after()
+
+    def _retry_after(self) -> float:
+        backlog = max(self._pending / self._requests.rate, self._pending_tokens / self._tokens.rate)
+        return max(1.0, backlog)
+
+    def submit(self, fn, *args, tokens: int = 0, priority: int = INTERACTIVE, **kwargs) -> Future:
+        """
+        Queue fn(*args, **kwargs) and return a Future for its result.
+        tokens is the estimated prompt plus output size charged to the tokens/min bucket.
+        """
+        return self._submit(functools.partial(fn, *args, **kwargs), tokens, priority)
+
+    def _submit(self, fn, tokens: int, priority: int, stream: bool = False) -> Future:
+        self._ensure_started()
+        limit = self.max_queue if priority == INTERACTIVE else self.batch_limit
+        with self._lock:
+            if self._pending >= limit:
+                self.rejected += 1
+                raise QueueFullError(self._retry_after())
+            self._pending += 1
+            self._pending_tokens += tokens
+        request = _Request(fn, tokens, priority, stream)
+        self._loop.call_soon_threadsafe(self._push, request)
+        return request.future
+
+    def call(self, fn, *args, tokens: int = 0, priority: int = INTERACTIVE, timeout: float = None, **kwargs):
+        """
+        Blocking form of submit: wait for the scheduled call and return its result.
+        """
+        return self.submit(fn, *args, tokens=tokens, priority=priority, **kwargs).result(timeout)
+
+    def stream(self, fn, *args, tokens: int = 0, priority: int = INTERACTIVE, timeout: float = None,
+               **kwargs) -> HeldStream:
+        """
+        Streaming form of call: fn(*args, **kwargs) returns an iterable of chunks.
+        The first chunk is read inside the scheduled call, so quota errors before any
+        output are retried like any other call; errors after it reach the caller.
+        The concurrency slot is held until the returned stream is exhausted or closed.
+        """
+        return self._submit(
+            functools.partial(_open_stream, functools.partial(fn, *args, **kwargs)), tokens, priority, stream=True,
+        ).result(timeout)
@@ -0,0 +1,176 @@
+# price_history.py
+
+import json
+import os
+import threading
+from datetime import date as date_cls, datetime, timedelta
+import numpy as np
+import storage
+
+# ----------------------------
+# Columnar per-ticker OHLCV history cache
+# ----------------------------
+
+COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+
+
+def to_day(value) -> int:
+    """Days since the Unix epoch for a 'YYYY-MM-DD' string, date, datetime or epoch day."""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.strptime(value, "%Y-%m-%d").date()
+    elif isinstance(value, datetime):
+        value = value.date()
+    return int(np.datetime64(value, "D").astype(np.int64))
+
+
+def from_day(day: int) -> date_cls:
+    return date_cls(1970, 1, 1) + timedelta(days=int(day))
+
+
+def _load_array(path: str) -> np.ndarray:
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:
+        # Zero-length arrays cannot be memory-mapped
+        return np.load(path)
+
+
+def merge_ranges(ranges: list) -> list:
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def missing_ranges(coverage: list, start: int, end: int) -> list:
+    """Sub-ranges of [start, end) not covered by the sorted, merged coverage ranges."""
+    gaps = []
+    cursor = start
+    for c_start, c_end in coverage:
+        if c_end <= cursor:
+            continue
+        if c_start >= end:
+            break
+        if c_start > cursor:
+            gaps.append((cursor, c_start))
+        cursor = max(cursor, c_end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+class PriceHistoryCache:
+    """
+    Stores each ticker's daily OHLCV as memory-mapped NumPy arrays
+    (dates.npy: int64 epoch days, ohlcv.npy: float64 rows in COLUMNS order)
+    plus the date ranges already fetched. Lookups binary-search the date
+    column; only date ranges not yet covered are fetched.
+    """
+
+    def __init__(self, fetch_history, dirname: str = "prices"):
+        # fetch_history(ticker, start_day, end_day) -> (epoch_days int64[n], ohlcv float64[n, 5]); end exclusive
+        self._fetch_history = fetch_history
+        self.root = storage.cache_path(dirname)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._mapped = {}  # ticker -> (dates, ohlcv, coverage)
+        self.upstream_calls = 0
+
+    def _lock(self, ticker: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def _dir(self, ticker: str) -> str:
+        return os.path.join(self.root, ticker.replace("/", "_"))
+
+    def _open(self, ticker: str):
+        mapped = self._mapped.get(ticker)
+        if mapped is not None:
+            return mapped
+        path = self._dir(ticker)
+        try:
+            dates = _load_array(os.path.join(path, "dates.npy"))
+            ohlcv = _load_array(os.path.join(path, "ohlcv.npy"))
+            with open(os.path.join(path, "coverage.json")) as f:
+                coverage = json.load(f)
+        except FileNotFoundError:
+            dates = np.empty(0, dtype=np.int64)
+            ohlcv = np.empty((0, len(COLUMNS)), dtype=np.float64)
+            coverage = []
+        mapped = (dates, ohlcv, coverage)
+        self._mapped[ticker] = mapped
+        return mapped
+
+    def _write(self, ticker: str, dates, ohlcv, coverage):
+        """Write all three files via temp files + os.replace so readers never see partial data."""
+        path = self._dir(ticker)
+        os.makedirs(path, exist_ok=True)
+        for name, array in (("dates.npy", dates), ("ohlcv.npy", ohlcv)):
+            tmp = os.path.join(path, f".{name}.tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp, os.path.join(path, name))
+        tmp = os.path.join(path, ".coverage.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(coverage, f)
+        os.replace(tmp, os.path.join(path, "coverage.json"))
+        self._mapped.pop(ticker, None)
+
+    def _ensure(self, ticker: str, start: int, end: int):
+        dates, ohlcv, coverage = self._open(ticker)
+        gaps = missing_ranges(coverage, start, end)
+        if not gaps:
+            return dates, ohlcv
+        with self._lock(ticker):
+            dates, ohlcv, coverage = self._open(ticker)
+            gaps = missing_ranges(coverage, start, end)
+            if not gaps:
+                return dates, ohlcv
+
+            new_dates, new_rows = [], []
+            for gap_start, gap_end in gaps:
+                fetched_dates, fetched_rows = self._fetch_history(ticker, gap_start, gap_end)
+                self.upstream_calls += 1
+                new_dates.append(np.asarray(fetched_dates, dtype=np.int64))
+                new_rows.append(np.asarray(fetched_rows, dtype=np.float64).reshape(-1, len(COLUMNS)))
+
+            # Freshly fetched bars come first so they win over stored duplicates
+            all_dates = np.concatenate(new_dates + [np.asarray(dates)])
+            all_rows = np.concatenate(new_rows + [np.asarray(ohlcv)])
+            all_dates, first = np.unique(all_dates, return_index=True)
+            all_rows = all_rows[first]
+
+            # Today's bar is still moving, so only days before today count as covered
+            today = to_day(date_cls.today())
+            covered = [[s, min(e, today)] for s, e in gaps if s < today]
+            self._write(ticker, all_dates, all_rows, merge_ranges(coverage + covered))
+            return self._open(ticker)[:2]
+
+    def get_range(self, ticker: str, start, end) -> tuple:
+        """
+        Return (epoch_days, ohlcv) views for start <= day < end, fetching only uncovered days.
+        """
+        start_day, end_day = to_day(start), to_day(end)
+        dates, ohlcv = self._ensure(ticker, start_day, end_day)
+        lo = np.searchsorted(dates, start_day, side="left")
+        hi = np.searchsorted(dates, end_day, side="left")
+        return dates[lo:hi], ohlcv[lo:hi]
+
+    def get_close(self, ticker: str, day) -> float | None:
+        """
+        Closing price on exactly this day, or None if the market had no session.
+        """
+        target = to_day(day)
+        # A miss loads the whole calendar year up to today, so neighbouring dates need no fetch
+        year = from_day(target).year
+        year_end = min(to_day(date_cls(year + 1, 1, 1)), to_day(date_cls.today()))
+        dates, ohlcv = self._ensure(ticker, to_day(date_cls(year, 1, 1)), max(year_end, target + 1))
+        i = np.searchsorted(dates, target)
+        if i < len(dates) and dates[i] == target:
+            return float(ohlcv[i, COLUMNS.index("Close")])
+        return None
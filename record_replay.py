@@ -0,0 +1,228 @@
+# record_replay.py
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from datetime import date as date_cls
+import storage
+
+# ----------------------------
+# Record / replay of outbound responses
+# ----------------------------
+#
+# ECONOSAGE_RECORD_MODE=record  captures every wrapped upstream response into the fixture store
+# ECONOSAGE_RECORD_MODE=replay  serves them back without touching the network
+# ECONOSAGE_FIXTURES            fixture directory, one JSON file per channel (default: <cache dir>/fixtures)
+# ECONOSAGE_REPLAY_LATENCY      seconds of synthetic latency per replayed call, or "recorded"
+#                               to reuse the latency captured while recording (default 0)
+
+MODE = os.getenv("ECONOSAGE_RECORD_MODE", "off").strip().lower()
+REPLAY_LATENCY = os.getenv("ECONOSAGE_REPLAY_LATENCY", "0").strip().lower()
+
+
+class FixtureMissingError(LookupError):
+    """Raised in replay mode when no recorded response exists for a call."""
+
+
+class RecordedError(RuntimeError):
+    """Replayed in place of a recorded exception whose class is not available."""
+
+
+class FixtureStore:
+    """
+    Recorded responses as one JSON file per channel, {call key: [entry, ...]}.
+    Repeated identical calls are stored in sequence and replayed in the same
+    order, cycling when a replay run makes more calls than were recorded.
+    Entries are plain JSON, so fixture files are safe to load and diff.
+    """
+
+    def __init__(self, path: str = None):
+        self.root = path or os.getenv("ECONOSAGE_FIXTURES") or storage.cache_path("fixtures")
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._channels = {}  # channel -> {call key: [entry, ...]}
+        self._cursors = {}
+
+    def _path(self, channel: str) -> str:
+        return os.path.join(self.root, f"{channel}.json")
+
+    def _load(self, channel: str) -> dict:
+        entries = self._channels.get(channel)
+        if entries is None:
+            try:
+                with open(self._path(channel), encoding="utf-8") as f:
+                    entries = json.load(f)
+            except FileNotFoundError:
+                entries = {}
+            self._channels[channel] = entries
+        return entries
+
+    def record(self, channel: str, key: str, entry: dict):
+        json.dumps(entry)  # unserializable results fail here, before the file is touched
+        with self._lock:
+            entries = self._load(channel)
+            entries.setdefault(key, []).append(entry)
+            path = self._path(channel)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entries, f, indent=1, sort_keys=True, ensure_ascii=False)
+            os.replace(tmp, path)
+
+    def replay(self, channel: str, key: str) -> dict:
+        """Return the next recorded entry for this call."""
+        with self._lock:
+            recorded = self._load(channel).get(key)
+            if not recorded:
+                raise FixtureMissingError(f"No recorded {channel} response for {key}")
+            seq = self._cursors.get((channel, key), 0)
+            self._cursors[(channel, key)] = seq + 1
+            return recorded[seq % len(recorded)]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> FixtureStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = FixtureStore()
+    return _store
+
+
+def _call_key(parts) -> str:
+    return json.dumps(parts, sort_keys=True, default=repr, ensure_ascii=False)
+
+
+def _replay_delay(recorded_elapsed: float) -> float:
+    if REPLAY_LATENCY == "recorded":
+        return recorded_elapsed
+    try:
+        return float(REPLAY_LATENCY)
+    except ValueError:
+        return 0.0
+
+
+def encode_error(error: Exception) -> dict:
+    try:
+        args = json.loads(json.dumps(list(error.args)))
+    except (TypeError, ValueError):
+        args = [str(error)]
+    return {"module": type(error).__module__, "type": type(error).__qualname__, "args": args}
+
+
+def decode_error(data: dict) -> Exception:
+    """
+    Rebuild a recorded exception from a class in an already imported module;
+    nothing is imported or executed on behalf of a fixture. Anything else
+    comes back as RecordedError.
+    """
+    cls = sys.modules.get(data["module"])
+    for name in data["type"].split("."):
+        cls = getattr(cls, name, None)
+    if isinstance(cls, type) and issubclass(cls, Exception):
+        try:
+            return cls(*data["args"])
+        except Exception:
+            pass
+    return RecordedError(f"{data['module']}.{data['type']}: {', '.join(map(str, data['args']))}")
+
+
+def today_relative_day(day: int):
+    """
+    Key part for a range end in epoch days: ends reaching today mean "up to now"
+    and are keyed as None, so a recording still replays on later days.
+    """
+    today = (date_cls.today() - date_cls(1970, 1, 1)).days
+    return None if day >= today else day
+
+
+def recordable(channel: str, key=None, encode=None, decode=None):
+    """
+    Decorator for functions that talk to an upstream service.
+    key(*args, **kwargs) picks the parts of the call that identify it (default: all arguments);
+    encode/decode convert the result to and from JSON-compatible values.
+    Exceptions are recorded and re-raised on replay.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if MODE not in ("record", "replay"):
+                return fn(*args, **kwargs)
+
+            call_key = _call_key(key(*args, **kwargs) if key else [args, kwargs])
+
+            if MODE == "replay":
+                entry = get_store().replay(channel, call_key)
+                time.sleep(_replay_delay(entry["elapsed"]))
+                if entry["outcome"] == "error":
+                    raise decode_error(entry["error"])
+                return decode(entry["value"]) if decode else entry["value"]
+
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                get_store().record(channel, call_key, {
+                    "outcome": "error", "error": encode_error(e), "elapsed": time.perf_counter() - started,
+                })
+                raise
+            get_store().record(channel, call_key, {
+                "outcome": "ok", "value": encode(result) if encode else result,
+                "elapsed": time.perf_counter() - started,
+            })
+            return result
+
+        return wrapper
+    return decorator
+
+
+def recordable_stream(channel: str, key=None):
+    """
+    Decorator for generator functions that stream chunks from an upstream service.
+    Recording passes chunks through as they arrive and stores the whole sequence
+    (and any exception) once the stream ends; replay yields the recorded chunks,
+    spreading the replay latency across them.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if MODE not in ("record", "replay"):
+                yield from fn(*args, **kwargs)
+                return
+
+            call_key = _call_key(key(*args, **kwargs) if key else [args, kwargs])
+
+            if MODE == "replay":
+                entry = get_store().replay(channel, call_key)
+                delay = _replay_delay(entry["elapsed"]) / max(len(entry["chunks"]), 1)
+                for chunk in entry["chunks"]:
+                    time.sleep(delay)
+                    yield chunk
+                if entry["outcome"] == "error":
+                    raise decode_error(entry["error"])
+                return
+
+            started = time.perf_counter()
+            chunks = []
+            try:
+                for chunk in fn(*args, **kwargs):
+                    chunks.append(chunk)
+                    yield chunk
+            except Exception as e:
+                get_store().record(channel, call_key, {
+                    "outcome": "error", "chunks": chunks, "error": encode_error(e),
+                    "elapsed": time.perf_counter() - started,
+                })
+                raise
+            get_store().record(channel, call_key, {
+                "outcome": "ok", "chunks": chunks, "elapsed": time.perf_counter() - started,
+            })
+
+        return wrapper
+    return decorator
@@ -0,0 +1,77 @@
+# response_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+
+# ----------------------------
+# Cache of finished explanations for evergreen questions
+# ----------------------------
+
+def normalize_question(question: str) -> str:
+    return " ".join(question.lower().split()).rstrip(" ?!.")
+
+
+class ResponseCache:
+    """
+    Final answers keyed by (normalized question, target language, region), kept
+    for ttl_seconds and evicted least-recently-used beyond max_entries. Each entry
+    holds the English answer and its translation, so a hit needs neither the
+    model nor the translation service.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 86400):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (stored_at, english, translated)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(question: str, lang_code: str, region: str) -> tuple:
+        return normalize_question(question), (lang_code or "en").lower(), (region or "").upper()
+
+    def get(self, question: str, lang_code: str, region: str) -> tuple | None:
+        """
+        Return (english, translated) for a cached answer, or None.
+        """
+        key = self._key(question, lang_code, region)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] >= self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, question: str, lang_code: str, region: str, english: str, translated: str):
+        key = self._key(question, lang_code, region)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), english, translated)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, question: str = None, lang_code: str = None, region: str = None) -> int:
+        """
+        Drop entries matching every given field (all entries when none is given).
+        Returns the number of entries removed.
+        """
+        question = normalize_question(question) if question is not None else None
+        lang_code = lang_code.lower() if lang_code is not None else None
+        region = region.upper() if region is not None else None
+        with self._lock:
+            doomed = [
+                key for key in self._entries
+                if (question is None or key[0] == question)
+                and (lang_code is None or key[1] == lang_code)
+                and (region is None or key[2] == region)
+            ]
+            for key in doomed:
+                del self._entries[key]
+            return len(doomed)
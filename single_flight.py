@@ -0,0 +1,109 @@
+# single_flight.py
+
+import functools
+import inspect
+import threading
+
+# ----------------------------
+# Request coalescing for identical in-flight calls
+# ----------------------------
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Lets concurrent callers with the same key share one execution:
+    the first caller runs the function, later callers wait for and
+    receive its result (or its exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+
+# Shared by every fetcher in the process
+FETCH_FLIGHTS = SingleFlight()
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _normalize(v)) for k, v in value.items()))
+    return value
+
+
+def call_key(fn, signature: inspect.Signature, args, kwargs) -> tuple:
+    """
+    Hashable key for a call of fn: defaults applied, whitespace collapsed,
+    lists and dicts made hashable. Raises TypeError for unbindable or unhashable calls.
+    """
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    key = (f"{fn.__module__}.{fn.__qualname__}",) + tuple((k, _normalize(v)) for k, v in bound.arguments.items())
+    hash(key)
+    return key
+
+
+def coalesce(fn=None, *, group: SingleFlight = None):
+    """
+    Decorator: concurrent calls of fn with the same normalized arguments
+    (defaults applied, whitespace collapsed) share one in-flight call.
+    """
+    if fn is None:
+        return functools.partial(coalesce, group=group)
+
+    flights = group or FETCH_FLIGHTS
+    signature = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            key = call_key(fn, signature, args, kwargs)
+        except TypeError:
+            return fn(*args, **kwargs)  # unbindable or unhashable arguments: no coalescing
+        return flights.do(key, fn, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,25 @@
+# storage.py
+
+import os
+import sqlite3
+
+# Local on-disk caches shared by every worker process on the host
+CACHE_DIR = os.getenv("ECONOSAGE_CACHE_DIR", ".econosage_cache")
+
+
+def cache_path(filename: str) -> str:
+    """
+    Absolute path for a cache file, creating the cache directory if needed.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.abspath(os.path.join(CACHE_DIR, filename))
+
+
+def connect(filename: str) -> sqlite3.Connection:
+    """
+    Open a SQLite cache database that several threads and processes can share.
+    """
+    conn = sqlite3.connect(cache_path(filename), timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# Stores open their SQLite files and array caches at import time; keep them out of the working tree
+os.environ.setdefault("ECONOSAGE_CACHE_DIR", tempfile.mkdtemp(prefix="econosage-tests-"))
+os.environ["ECONOSAGE_RECORD_MODE"] = "off"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,69 @@
+import pytest
+import batch_intent
+import intent_detection
+from intent_cache import IntentCache
+
+FORMULA = "FORMULA: simple_interest: P = 1000, r = 5, t = 3"
+
+
+@pytest.fixture
+def caches(tmp_path, monkeypatch):
+    interactive = IntentCache(filename=str(tmp_path / "intents.sqlite3"))
+    batch = IntentCache(filename=str(tmp_path / "batch_intents.sqlite3"))
+    monkeypatch.setattr(batch_intent, "INTENT_CACHE", interactive)
+    monkeypatch.setattr(batch_intent, "BATCH_INTENT_CACHE", batch)
+    return interactive, batch
+
+
+@pytest.fixture
+def model(monkeypatch):
+    """Fake classify_batch: replies per query from a dict, None for unknown queries."""
+    state = {"replies": {}, "batches": []}
+
+    def classify_batch(queries):
+        state["batches"].append(list(queries))
+        return [
+            intent_detection.classify_rephrased(state["replies"][q]) if q in state["replies"] else None
+            for q in queries
+        ]
+
+    monkeypatch.setattr(batch_intent, "classify_batch", classify_batch)
+    return state
+
+
+def test_batch_results_never_reach_the_interactive_cache(caches, model):
+    interactive, batch = caches
+    query = "simple interest on 1000 at 5 percent for 3 years"
+    model["replies"][query] = FORMULA
+
+    results = list(batch_intent.classify_queries([query]))
+    assert results == [(0, query, ("formula", "simple_interest", FORMULA), None)]
+    assert interactive.get(query) is None
+    assert batch.get(query) == ("formula", "simple_interest", FORMULA)
+
+    # Batch runs reuse their own cache
+    list(batch_intent.classify_queries([query]))
+    assert len(model["batches"]) == 1
+
+
+def test_interactive_results_are_reused_read_only(caches, model):
+    interactive, _ = caches
+    query = "simple interest on 2000 at 5 percent for 3 years"
+    interactive.put(query, ("formula", "simple_interest", "FORMULA: simple_interest: P = 2000, r = 5, t = 3"))
+    results = list(batch_intent.classify_queries([query, query.upper()]))
+    assert [r[0] for r in sorted(results)] == [0, 1]
+    assert model["batches"] == []
+
+
+def test_duplicates_sent_once_and_missing_items_retried(caches, model):
+    answered, missing = "what is inflation", "what is gdp"
+    model["replies"][answered] = "THEORETICAL"
+    results = sorted(batch_intent.classify_queries([answered, missing, "What  is inflation"], batch_size=10))
+    assert model["batches"] == [[answered, missing], [missing]]
+    assert results[0][2][0] == "theoretical" and results[2][2][0] == "theoretical"
+    assert results[1][2] is None and results[1][3] == "no reply for this item"
+
+
+def test_parse_replies_ignores_malformed_lines():
+    text = '{"id": 1, "reply": "THEORETICAL"}\nnoise\n{"id": 7, "reply": "x"}\n{"id": 2, "reply": ""}\n'
+    assert batch_intent._parse_replies(text, 2) == {1: "THEORETICAL"}
@@ -0,0 +1,38 @@
+import pytest
+from econ_compute import FORMULA_INPUTS, SUPPORTED_FUNCTIONS, execute_formula
+
+# Inputs that are not plain numbers
+SAMPLE_VALUES = {
+    "cash_flows": [-1000.0, 400.0, 500.0, 600.0],
+    "slabs": [250000, 500000, 1000000],
+    "rates": [0.0, 0.05, 0.2, 0.3],
+    "weights_dict": {"food": 0.6, "fuel": 0.4},
+    "inflation_dict": {"food": 0.05, "fuel": 0.1},
+    "income": 800000.0,
+    "mpc": 0.8,
+    "mps": 0.2,
+    "price_per_unit": 5.0,
+}
+
+
+def _sample_params(formula):
+    return {name: SAMPLE_VALUES.get(name, 2.0) for name in FORMULA_INPUTS[formula]}
+
+
+def test_every_table_entry_is_a_supported_formula():
+    assert set(FORMULA_INPUTS) <= set(SUPPORTED_FUNCTIONS)
+
+
+@pytest.mark.parametrize("formula", sorted(FORMULA_INPUTS))
+def test_listed_inputs_are_sufficient(formula):
+    execute_formula(formula, _sample_params(formula))
+
+
+@pytest.mark.parametrize("formula, missing", [
+    (formula, name) for formula in sorted(FORMULA_INPUTS) for name in FORMULA_INPUTS[formula]
+])
+def test_each_listed_input_is_required(formula, missing):
+    params = _sample_params(formula)
+    del params[missing]
+    with pytest.raises(ValueError, match="(?i)missing|required|insufficient"):
+        execute_formula(formula, params)
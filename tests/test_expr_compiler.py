@@ -0,0 +1,103 @@
+import ast
+import math
+import operator as op
+
+import numpy as np
+import pytest
+
+from expr_compiler import CompiledExpr, ExprError, compile_expr
+from intent_detection import safe_eval_expr
+
+
+def reference_eval(expr):
+    """The tree-walking evaluator compile_expr replaced (constants only)."""
+    operators = {
+        ast.Add: op.add, ast.Sub: op.sub, ast.Mult: op.mul,
+        ast.Div: op.truediv, ast.Pow: op.pow, ast.USub: op.neg
+    }
+
+    def _eval(node):
+        if isinstance(node, ast.Constant): return node.value
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub): return -_eval(node.operand)
+        elif isinstance(node, ast.BinOp): return operators[type(node.op)](_eval(node.left), _eval(node.right))
+        else: raise ValueError("Unsupported expression")
+
+    try:
+        node = ast.parse(expr, mode='eval').body
+        return _eval(node)
+    except Exception:
+        return expr
+
+
+EXPRESSIONS = [
+    "1 + 2 * 3",
+    "(1 + 2) * 3",
+    "1000 * (1 + 0.05 / 12) ** (12 * 3)",
+    "-5 - -3",
+    "2 ** -1",
+    "10 / 4",
+    "-(2 ** 0.5) * 3.5 + 1e3",
+    "100000 * 0.0075 * (1 + 0.0075) ** 240 / ((1 + 0.0075) ** 240 - 1)",
+]
+
+
+@pytest.mark.parametrize("expr", EXPRESSIONS)
+def test_matches_reference_evaluator(expr):
+    assert compile_expr(expr)() == pytest.approx(reference_eval(expr), rel=1e-12)
+    assert safe_eval_expr(expr) == pytest.approx(reference_eval(expr), rel=1e-12)
+
+
+def test_variables_and_caret_powers():
+    compiled = compile_expr("P * (1 + r / n) ^ (n * t)")
+    assert compiled.variables == ("P", "n", "r", "t")
+    assert compiled(P=1000, r=0.05, n=12, t=3) == pytest.approx(1000 * (1 + 0.05 / 12) ** 36)
+    assert compile_expr("sqrt(x) + max(a, b)")(x=16, a=1, b=2) == 6
+
+
+def test_compiled_once_per_text():
+    assert compile_expr("a + b") is compile_expr("a + b")
+
+
+@pytest.mark.parametrize("expr", [
+    "__import__('os')",
+    "x.__class__",
+    "open('f')",
+    "[1, 2]",
+    "'a' * 3",
+    "x if y else z",
+    "a < b",
+    "sqrt(x=1)",
+    "lambda: 1",
+    "__builtins__",
+    "1 +",
+])
+def test_rejects_expressions_outside_whitelist(expr):
+    with pytest.raises(ExprError):
+        CompiledExpr(expr)
+
+
+def test_missing_variable():
+    with pytest.raises(ExprError, match="r"):
+        compile_expr("P * r")(P=1)
+
+
+def test_safe_eval_falls_back_to_raw_text():
+    assert safe_eval_expr("__import__('os')") == "__import__('os')"
+    assert safe_eval_expr("P * r") == "P * r"
+
+
+def test_arrays_broadcast_elementwise():
+    result = compile_expr("P * (1 + r) ** t")(P=100, r=[0.01, 0.02, 0.03], t=2)
+    np.testing.assert_allclose(result, [100 * (1 + r) ** 2 for r in (0.01, 0.02, 0.03)])
+
+
+def test_grid_has_one_axis_per_sequence():
+    compiled = compile_expr("P * (1 + r) ** t")
+    rates, years = [0.01, 0.05], [1, 2, 3]
+    table = compiled.grid(P=100, r=rates, t=years)
+    assert table.shape == (2, 3)
+    for i, r in enumerate(rates):
+        for j, t in enumerate(years):
+            assert table[i, j] == pytest.approx(100 * (1 + r) ** t)
+    assert compiled.grid(P=100, r=0.05, t=2) == pytest.approx(110.25)
+    assert math.isclose(float(compiled.grid(P=100, r=[0.05], t=2)[0]), 110.25)
@@ -0,0 +1,93 @@
+import random
+import re
+
+import pytest
+
+from intent_detection import PARAM_PATTERNS, PERCENT_PARAMS, _lead_chars, extract_params
+
+
+def reference_extract(text):
+    """The per-pattern re.search loop the single-pass scanner replaced."""
+    params = {}
+    for param, pattern in PARAM_PATTERNS.items():
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            val = match.group(1)
+            if val:
+                try:
+                    val_float = float(val)
+                    if param in PERCENT_PARAMS and val_float > 1:
+                        val_float /= 100
+                    params[param] = val_float
+                except Exception:
+                    pass
+    return params
+
+
+WORDS = [
+    "principal", "P", "rate", "interest rate", "r", "time", "t", "n", "compounded", "amount", "A",
+    "gain", "profit", "cost", "fixed costs", "selling price", "variable cost per unit", "discount",
+    "discount rate", "cash flows", "payment", "PMT", "rate per period", "periods", "initial investment",
+    "percent change in quantity", "percentage change in price", "gdp", "gdp at time t", "gdp at time t-1",
+    "total debt", "revenue", "sales", "beta", "market return", "risk-free rate", "NOI", "demand",
+    "E", "V", "Re", "D", "Rd", "Tc", "markup", "ticker", "price of", "for", "year", "from currency",
+    "the", "of", "and", "what is", "compute", "(", ")", "usd", "AAPL", "IN",
+]
+LINKS = ["", " ", " = ", "=", " is ", ": ", " are "]
+VALUES = ["5", "5%", "0.05", "1000", "12.5", "2024", "1.", ".5", "[100, 200, 300]", "..", "3 %"]
+
+
+def _random_query(rng):
+    parts = []
+    for _ in range(rng.randint(1, 8)):
+        parts.append(rng.choice(WORDS))
+        if rng.random() < 0.7:
+            parts.append(rng.choice(LINKS) + rng.choice(VALUES))
+        parts.append(rng.choice([" ", ", ", " and ", "; "]))
+    return "".join(parts)
+
+
+@pytest.mark.parametrize("text", [
+    "gdp = 100, gdp = 90",
+    "gdp at time t = 100, gdp at time t-1 = 90",
+    "compound interest P = 1000, r = 5%, n = 12, t = 3",
+    "discount rate 8% with cash flows [100, 200, 300] and initial investment 250",
+    "wacc E = 600 D = 400 V = 1000 Re = 10 Rd = 5 Tc = 25",
+    "stock price of AAPL for year 2023",
+    "",
+    "nothing to see here",
+])
+def test_matches_reference_loop(text):
+    assert extract_params(text) == reference_extract(text)
+
+
+def test_matches_reference_loop_on_random_queries():
+    rng = random.Random(1234)
+    for _ in range(3000):
+        text = _random_query(rng)
+        assert extract_params(text) == reference_extract(text), text
+
+
+def test_keys_follow_pattern_order():
+    text = "t = 3, P = 1000, r = 5"
+    assert list(extract_params(text)) == list(reference_extract(text))
+
+
+def test_data_fetch_format():
+    assert extract_params("DATA_FETCH: get_stock_price: ticker = AAPL, days = 5") == {
+        "ticker": "AAPL", "days": 5.0,
+    }
+
+
+def test_rejects_non_string():
+    with pytest.raises(ValueError):
+        extract_params(None)
+
+
+def test_lead_chars():
+    assert _lead_chars(r"(?:principal|P)\s*([\d\.]+)") == {"p"}
+    assert _lead_chars(r"(?:gdp(?: at time t)?)\s*([\d\.]+)") == {"g"}
+    assert _lead_chars(r"(?:rate|(?:a|b)x)\s*(\d)") is None  # nested group first
+    assert _lead_chars(r"(?:a|b)?x(\d)") is None
+    assert _lead_chars(r"x(\d)") is None
+    assert _lead_chars(r"(?:|a)(\d)") is None
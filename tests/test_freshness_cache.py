@@ -0,0 +1,126 @@
+import threading
+import pytest
+import freshness_cache
+from freshness_cache import FreshnessCache, serve_stale
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(freshness_cache.time, "monotonic", clock)
+    return clock
+
+
+class Upstream:
+    """Fetcher returning (value, note) with a scripted sequence of values or errors."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+        self.called = threading.Event()
+
+    def __call__(self, symbol):
+        self.calls += 1
+        try:
+            outcome = self.outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome, f"Quote for {symbol}"
+        finally:
+            self.called.set()
+
+
+def _serve(cache, upstream, fresh=60, max_stale=3600):
+    @serve_stale("yahoo", fresh, max_stale, cache=cache)
+    def get_quote(symbol):
+        return upstream(symbol)
+
+    return get_quote
+
+
+def test_fresh_results_are_served_from_cache(clock):
+    upstream = Upstream(1.0)
+    fetch = _serve(FreshnessCache(), upstream)
+    assert fetch("AAPL") == (1.0, "Quote for AAPL")
+    clock.now += 30
+    assert fetch("AAPL") == (1.0, "Quote for AAPL")
+    assert upstream.calls == 1
+
+
+def test_stale_result_is_served_while_refreshing(clock):
+    upstream = Upstream(1.0, 2.0)
+    cache = FreshnessCache()
+    fetch = _serve(cache, upstream)
+    fetch("AAPL")
+
+    clock.now += 120
+    upstream.called.clear()
+    value, note = fetch("AAPL")
+    assert value == 1.0 and "cached data, 2 min old" in note
+
+    assert upstream.called.wait(5)
+    cache._pool.shutdown(wait=True)
+    assert fetch("AAPL") == (2.0, "Quote for AAPL")
+    assert upstream.calls == 2
+
+
+def test_too_old_result_is_refetched_synchronously(clock):
+    upstream = Upstream(1.0, 2.0)
+    fetch = _serve(FreshnessCache(), upstream)
+    fetch("AAPL")
+    clock.now += 7200
+    assert fetch("AAPL") == (2.0, "Quote for AAPL")
+
+
+def test_cached_value_served_when_upstream_fails(clock):
+    upstream = Upstream(1.0, ConnectionError("down"))
+    fetch = _serve(FreshnessCache(), upstream)
+    fetch("AAPL")
+    clock.now += 7200
+    value, note = fetch("AAPL")
+    assert value == 1.0 and "2.0 h old" in note
+
+
+def test_errors_without_cached_value_propagate(clock):
+    fetch = _serve(FreshnessCache(), Upstream(ValueError("unknown ticker")))
+    with pytest.raises(ValueError):
+        fetch("ZZZZ")
+
+
+def test_unhealthy_upstream_is_not_contacted(clock):
+    cache = FreshnessCache(failure_threshold=2, cooldown_seconds=300)
+    healthy = Upstream(1.0)
+    fetch = _serve(cache, healthy)
+    fetch("AAPL")
+
+    failing = _serve(cache, Upstream(ConnectionError("down"), ConnectionError("down")))
+    for symbol in ("MSFT", "GOOG"):
+        with pytest.raises(ConnectionError):
+            failing(symbol)
+    assert not cache.healthy("yahoo")
+
+    # Past the fresh window but within the cooldown: the stale value is served, nothing is fetched
+    clock.now += 100
+    value, note = fetch("AAPL")
+    assert value == 1.0 and "old" in note
+    assert healthy.calls == 1
+
+    clock.now += 200
+    assert cache.healthy("yahoo")
+
+
+def test_no_data_answers_do_not_count_as_failures(clock):
+    cache = FreshnessCache(failure_threshold=1)
+    fetch = _serve(cache, Upstream(ValueError("no data"), ValueError("no data")))
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            fetch("ZZZZ")
+    assert cache.healthy("yahoo")
@@ -0,0 +1,105 @@
+import threading
+from datetime import date, timedelta
+import pytest
+from fx_rates import FXHistoryStore
+from price_history import to_day
+
+
+class FakeFrankfurter:
+    """fetch_range stub: EUR->USD 1.1 and EUR->GBP 0.9 on every weekday of the range."""
+
+    def __init__(self):
+        self.calls = []
+        self.gate = None
+
+    def __call__(self, start_day, end_day):
+        self.calls.append((start_day, end_day))
+        if self.gate is not None:
+            self.gate.wait(5)
+        return {
+            day: {"USD": 1.1, "GBP": 0.9}
+            for day in range(start_day, end_day)
+            if date.fromordinal(date(1970, 1, 1).toordinal() + day).weekday() < 5
+        }
+
+
+@pytest.fixture
+def upstream():
+    return FakeFrankfurter()
+
+
+@pytest.fixture
+def store(tmp_path, upstream):
+    return FXHistoryStore(fetch_range=upstream, filename=str(tmp_path / "fx_history.sqlite3"))
+
+
+def _this_year_dates():
+    today = date.today()
+    earliest = date(today.year, 1, 1)
+    return [max(earliest, today - timedelta(days=n)) for n in (40, 10, 1, 0)]
+
+
+def test_warm_lookups_in_current_year_make_no_network_calls(store, upstream):
+    first, *rest = _this_year_dates()
+    assert store.get_rate("USD", "GBP", first) == pytest.approx(0.9 / 1.1)
+    assert len(upstream.calls) == 1
+    assert upstream.calls[0][1] == to_day(date.today())  # stops before today
+
+    series = dict(store._series)
+    for day in rest:
+        assert store.get_rate("GBP", "USD", day) == pytest.approx(1.1 / 0.9)
+    assert len(upstream.calls) == 1
+    # Cached arrays are not dropped by warm lookups
+    assert all(store._series[c] is series[c] for c in series)
+
+
+def test_past_years_load_once(store, upstream):
+    for day in ("2019-03-04", "2019-07-13", "2019-12-31"):
+        assert store.get_rate("EUR", "USD", day) == pytest.approx(1.1)
+    assert len(upstream.calls) == 1
+    start, end = upstream.calls[0]
+    assert end == to_day("2020-01-01") and start == to_day("2019-01-01") - store.max_gap_days
+
+
+def test_coverage_persists_across_instances(tmp_path, upstream):
+    path = str(tmp_path / "fx_history.sqlite3")
+    FXHistoryStore(fetch_range=upstream, filename=path).get_rate("USD", "EUR", "2021-05-05")
+    FXHistoryStore(fetch_range=upstream, filename=path).get_rate("USD", "EUR", "2021-09-09")
+    assert len(upstream.calls) == 1
+
+
+def test_concurrent_loads_share_one_fetch_without_blocking_the_store(store, upstream):
+    store.get_rate("EUR", "USD", "2018-06-01")  # warm one year
+    upstream.gate = threading.Event()
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(store.get_rate("EUR", "USD", "2022-02-02")))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+
+    for _ in range(100):
+        if len(upstream.calls) == 2:
+            break
+        threading.Event().wait(0.01)
+    assert len(upstream.calls) == 2  # the 2022 fetch is in flight
+
+    # Meanwhile warm lookups for another year still complete
+    warm = []
+    lookup = threading.Thread(target=lambda: warm.append(store.get_rate("EUR", "GBP", "2018-06-04")))
+    lookup.start()
+    lookup.join(2)
+    assert warm == [pytest.approx(0.9)]
+
+    upstream.gate.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == [pytest.approx(1.1)] * 4
+    assert len(upstream.calls) == 2
+
+
+def test_missing_rate_raises(store):
+    with pytest.raises(ValueError):
+        store.get_rate("USD", "XYZ", "2020-02-03")
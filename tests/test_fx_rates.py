@@ -0,0 +1,89 @@
+import pytest
+import fx_rates
+from fx_rates import FXRateStore
+
+TABLES = {
+    "USD": {"EUR": 0.9, "JPY": 150.0, "GBP": 0.8},
+    "EUR": {"USD": 1.1, "JPY": 165.0},
+    "XAU": {"USD": 2000.0},
+}
+
+
+class FakeTables:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, base):
+        self.calls.append(base)
+        return dict(TABLES[base])
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(fx_rates.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def upstream():
+    return FakeTables()
+
+
+@pytest.fixture
+def store(upstream, clock):
+    return FXRateStore(fetch_table=upstream, ttl_seconds=60)
+
+
+def test_cross_rate_derived_from_pivot_table(store, upstream):
+    assert store.get_rate("eur", "jpy") == pytest.approx(150.0 / 0.9)
+    assert store.get_rate("GBP", "EUR") == pytest.approx(0.9 / 0.8)
+    assert store.get_rate("USD", "JPY") == 150.0
+    assert store.get_rate("JPY", "USD") == pytest.approx(1 / 150.0)
+    assert upstream.calls == ["USD"]
+    assert store.upstream_calls == 1
+
+
+def test_same_currency_needs_no_table(store, upstream):
+    assert store.get_rate("chf", "CHF") == 1.0
+    assert upstream.calls == []
+
+
+def test_falls_back_to_base_table_when_pivot_lacks_pair(store, upstream):
+    assert store.get_rate("XAU", "USD") == 2000.0
+    assert upstream.calls == ["USD", "XAU"]
+    # Now answered from the cached XAU table
+    assert store.get_rate("XAU", "USD") == 2000.0
+    assert upstream.calls == ["USD", "XAU"]
+
+
+def test_unknown_currency(store):
+    with pytest.raises(ValueError, match="ZZZ"):
+        store.get_rate("USD", "ZZZ")
+
+
+def test_expired_table_is_fetched_again(store, upstream, clock):
+    store.get_rate("EUR", "JPY")
+    clock.now += 59
+    store.get_rate("GBP", "JPY")
+    assert upstream.calls == ["USD"]
+    clock.now += 2
+    store.get_rate("EUR", "JPY")
+    assert upstream.calls == ["USD", "USD"]
+
+
+def test_invalidate(store, upstream):
+    store.get_table("usd")
+    store.invalidate("usd")
+    store.get_table("USD")
+    store.invalidate()
+    store.get_table("USD")
+    assert upstream.calls == ["USD", "USD", "USD"]
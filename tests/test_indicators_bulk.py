@@ -0,0 +1,77 @@
+import math
+import pytest
+import data_fetcher
+from indicator_store import IndicatorStore
+
+CPI = data_fetcher.INFLATION_INDICATOR
+
+
+class _Response:
+    def __init__(self, data):
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+def _record(iso2, iso3, year, value):
+    return {"country": {"id": iso2}, "countryiso3code": iso3, "date": str(year), "value": value}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = IndicatorStore(filename=str(tmp_path / "indicators.sqlite3"))
+    monkeypatch.setattr(data_fetcher, "INDICATORS", store)
+    return store
+
+
+@pytest.fixture
+def world_bank(monkeypatch):
+    """Serve one page of canned records and remember the requested URLs."""
+    state = {"records": [], "urls": []}
+
+    def fake_get(url, params=None, **kwargs):
+        state["urls"].append(url)
+        return _Response([{"page": 1, "pages": 1}, state["records"]])
+
+    monkeypatch.setattr(data_fetcher.http_client, "get", fake_get)
+    return state
+
+
+def test_bulk_fetch_builds_matrix_and_fills_store(store, world_bank):
+    world_bank["records"] = [
+        _record("IN", "IND", 2022, 6.7), _record("IN", "IND", 2023, 5.4),
+        _record("US", "USA", 2023, 4.1), _record("US", "USA", 2022, None),
+    ]
+    result = data_fetcher.get_indicators_bulk(["in", "US"], [CPI])
+    assert result["years"] == [2022, 2023] and result["countries"] == ["IN", "US"]
+    matrix = result["values"][CPI]
+    assert matrix[0, 0] == 6.7 and matrix[1, 0] == 5.4 and matrix[1, 1] == 4.1
+    assert math.isnan(matrix[0, 1])
+    assert len(world_bank["urls"]) == 1 and "IN;US" in world_bank["urls"][0]
+    assert store.get_value("US", CPI) == (2023, 4.1)
+
+
+def test_empty_country_keeps_stored_series(store, world_bank, monkeypatch):
+    store.put_series("GB", CPI, {2022: 9.1, 2023: 7.3})
+    store._refreshed[store._key("GB", CPI)] = 0  # long stale
+    world_bank["records"] = [_record("IN", "IND", 2023, 5.4)]
+
+    result = data_fetcher.get_indicators_bulk(["IN", "GB"], [CPI])
+
+    # Stored rows survive, are still stale (retried next time) and fill the matrix
+    assert store.get_series("GB", CPI) == {2022: 9.1, 2023: 7.3}
+    assert store.is_stale("GB", CPI)
+    assert not store.is_stale("IN", CPI)
+    assert result["values"][CPI][result["years"].index(2023), 1] == 7.3
+
+    # get_inflation_rate still answers for the country the bulk call got nothing for
+    monkeypatch.setattr(store, "refresh_in_background", lambda *args: None)
+    assert data_fetcher.get_inflation_rate("GB", 2022)[0] == 9.1
+
+
+def test_country_never_seen_is_not_marked_refreshed(store, world_bank):
+    world_bank["records"] = [_record("IN", "IND", 2023, 5.4)]
+    data_fetcher.get_indicators_bulk(["IN", "ZZ"], [CPI])
+    assert store.get_series("ZZ", CPI) is None
+    assert store.is_stale("ZZ", CPI)
@@ -0,0 +1,92 @@
+import pytest
+import intent_cache
+from intent_cache import IntentCache, fill_template, make_template, query_template
+from intent_detection import extract_params
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return IntentCache(filename=str(tmp_path / "intents.sqlite3"), max_memory_entries=2)
+
+
+def test_query_template_slots_numbers():
+    assert query_template("  Compound   interest P=5000, r = 5.5 for 3 years ") == (
+        "compound interest p=<n0>, r = <n1> for <n2> years", ["5000", "5.5", "3"],
+    )
+    # Comma thousands are one number; a date is split into several slots
+    assert query_template("Price of 1,250,000 on 2024-03-05") == (
+        "price of <n0> on <n1>-<n2>-<n3>", ["1250000", "2024", "03", "05"],
+    )
+    assert query_template("discount .5 then 10,5") == ("discount <n0> then <n1>,<n2>", [".5", "10", "5"])
+
+
+def test_digits_inside_identifiers_are_left_alone():
+    key, numbers = query_template("rule_of_72 for co2 with x1 = 6")
+    assert key == "rule_of_72 for co2 with x1 = <n0>" and numbers == ["6"]
+    assert make_template("FORMULA: rule_of_72: inflation_rate = 6", numbers) == \
+        "FORMULA: rule_of_72: inflation_rate = <n0>"
+
+
+def test_make_and_fill_template_round_trip():
+    _, numbers = query_template("compound interest on 10,000 at 5 for 3 years, 12 times a year")
+    template = make_template("FORMULA: compound_interest: P = 10000, r = 5, n = 12, t = 3", numbers)
+    assert template == "FORMULA: compound_interest: P = <n0>, r = <n1>, n = <n3>, t = <n2>"
+    assert fill_template(template, ["2500", "7", "10", "4"]) == \
+        "FORMULA: compound_interest: P = 2500, r = 7, n = 4, t = 10"
+
+
+@pytest.mark.parametrize("query, rephrased", [
+    # Derived values have no source in the query
+    ("simple interest on 1000 at 5% for 3 years", "FORMULA: simple_interest: P = 1000, r = 0.05, t = 3"),
+    # Repeated values are ambiguous
+    ("simple interest on 1000 at 3 percent for 3 years", "FORMULA: simple_interest: P = 1000, r = 3, t = 3"),
+    # Slot markers in the reply itself
+    ("simple interest on 1000", "FORMULA: simple_interest: P = <n0>"),
+])
+def test_unmappable_rephrasings_are_not_cached(cache, query, rephrased):
+    assert make_template(rephrased, query_template(query)[1]) is None
+    assert cache.put(query, ("formula", "simple_interest", rephrased)) is False
+    assert cache.get(query) is None
+
+
+def test_hit_refills_new_numbers(cache):
+    assert cache.put("Simple interest on 1000 at 5 percent for 3 years",
+                     ("formula", "simple_interest", "FORMULA: simple_interest: P = 1000, r = 5, t = 3"))
+    hit = cache.get("simple interest on 2,500 at 7 percent   for 10 years")
+    assert hit == ("formula", "simple_interest", "FORMULA: simple_interest: P = 2500, r = 7, t = 10")
+    assert extract_params(hit[2]) == {"P": 2500.0, "r": 0.07, "t": 10.0}
+    assert cache.get("simple interest on 2500 at 7 percent for 10 months") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_theoretical_entries_without_numbers(cache):
+    assert cache.put("What is inflation?", ("theoretical", None, "THEORETICAL"))
+    assert cache.get("what is   INFLATION?") == ("theoretical", None, "THEORETICAL")
+
+
+def test_entries_are_shared_through_sqlite_and_expire(tmp_path, cache, monkeypatch):
+    query, result = "what is gdp", ("theoretical", None, "THEORETICAL")
+    cache.put(query, result)
+    other = IntentCache(filename=str(tmp_path / "intents.sqlite3"), ttl_seconds=60)
+    assert other.get(query) == result
+
+    now = intent_cache.time.time()
+    monkeypatch.setattr(intent_cache.time, "time", lambda: now + 61)
+    assert other.get(query) is None
+
+
+def test_memory_lru_falls_back_to_sqlite(cache):
+    for query in ["what is gdp", "what is cpi", "what is ppp"]:
+        cache.put(query, ("theoretical", query.split()[-1], "THEORETICAL"))
+    assert len(cache._memory) == 2 and "what is gdp" not in cache._memory
+    assert cache.get("what is gdp") == ("theoretical", "gdp", "THEORETICAL")
+    assert "what is gdp" in cache._memory
+
+
+def test_invalidate(cache):
+    cache.put("what is gdp", ("theoretical", None, "THEORETICAL"))
+    cache.put("what is cpi", ("theoretical", None, "THEORETICAL"))
+    cache.invalidate("What is GDP")
+    assert cache.get("what is gdp") is None and cache.get("what is cpi") is not None
+    cache.invalidate()
+    assert cache.get("what is cpi") is None
@@ -0,0 +1,117 @@
+import os
+import subprocess
+import sys
+import pytest
+import intent_detection
+from econ_compute import execute_formula
+from formula_inputs import FORMULA_INPUTS, FRACTION_INPUTS
+from intent_detection import PERCENT_PARAMS, classify_locally, explicit_params, parse_user_query
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("compound interest with P = 5000, r = 5%, n = 4, t = 2",
+     ("compound_interest", {"P": 5000.0, "r": 0.05, "n": 4.0, "t": 2.0})),
+    ("Compound interest: P: 5000, r: 0.05, n: 4, t: 2.",
+     ("compound_interest", {"P": 5000.0, "r": 0.05, "n": 4.0, "t": 2.0})),
+    # Stray explicit names are dropped; bare percentages of rate inputs are scaled
+    ("simple interest P=1000 r=5 t=3 D=4",
+     ("simple_interest", {"P": 1000.0, "r": 0.05, "t": 3.0})),
+    # Numbers inside the matched keyword are not inputs
+    ("rule of 72 with inflation_rate = 6%", ("rule_of_72", {"inflation_rate": 0.06})),
+    ("wacc E = 600, V = 1000, Re = 10%, D = 400, Rd = 5%, Tc = 30%",
+     ("wacc", {"E": 600.0, "V": 1000.0, "Re": 0.1, "D": 400.0, "Rd": 0.05, "Tc": 0.3})),
+])
+def test_explicit_queries_take_the_fast_path(query, expected):
+    assert classify_locally(query) == expected
+
+
+@pytest.mark.parametrize("query", [
+    # Inputs stated in words: the old regex scan read r, t and a stray D out of these
+    "Calculate compound interest on principal 5000 at 5% for 2 years compounded 4 times",
+    "compound interest for 2000 dollars at 6% for 10 years compounded monthly n 12, principal 2000",
+    "simple interest for principal 1000 at rate 5 percent over 3 years, time 3",
+    "What is the compound interest on 10000 at 8% for 5 years?",
+    # A number that is not bound to any input
+    "compound interest P = 5000, r = 5%, n = 4, t = 2, plus 100 deposited monthly",
+    # Conflicting values
+    "compound interest P = 5000, P = 6000, r = 5%, n = 4, t = 2",
+    # Missing input
+    "compound interest P = 5000, r = 5%, t = 2",
+    # Word-bounded names only
+    "compound interest xP = 5000, r = 5%, n = 4, t = 2",
+    # Not a formula, or nothing to compute
+    "explain compound interest",
+    "stock price of AAPL",
+])
+def test_natural_language_queries_go_to_gemini(query):
+    assert classify_locally(query) is None
+
+
+def test_explicit_params_rejects_unbound_numbers():
+    assert explicit_params("r = 5% over 3 years") is None
+    assert explicit_params("r = 5% over 3 years", ignore_spans=[(12, 13)]) == {"r": 0.05}
+    assert explicit_params("t: 10:30") is None
+
+
+@pytest.mark.parametrize("query, formula, params, result", [
+    ("sales tax base_price=100 tax_rate=18", "sales_tax", {"base_price": 100.0, "tax_rate": 0.18}, 118.0),
+    ("rule of 72 inflation_rate=6", "rule_of_72", {"inflation_rate": 0.06}, 12.0),
+    ("real interest rate nominal_rate=8 inflation_rate=5", "real_interest_rate",
+     {"nominal_rate": 0.08, "inflation_rate": 0.05}, 0.0286),
+    ("minimum wage current_wage = 100, min_wage = 120, workforce_pct = 25", "minimum_wage_impact",
+     {"current_wage": 100.0, "min_wage": 120.0, "workforce_pct": 0.25}, None),
+    ("fiscal multiplier mpc = 80, mps = 20", "public_investment_multiplier", {"mpc": 0.8, "mps": 0.2}, None),
+    ("fuel cost base_cost = 1000, fuel_share = 30%, price_delta = 50", "fuel_cost_impact",
+     {"base_cost": 1000.0, "fuel_share": 0.3, "price_delta": 50.0}, 1015.0),
+    # Already a fraction
+    ("sales tax base_price=100 tax_rate=0.18", "sales_tax", {"base_price": 100.0, "tax_rate": 0.18}, 118.0),
+])
+def test_rate_inputs_given_as_percentages_are_scaled(query, formula, params, result):
+    assert classify_locally(query) == (formula, params)
+    if result is not None:
+        assert execute_formula(formula, params)[0] == pytest.approx(result)
+
+
+def test_every_rate_and_share_input_is_scaled():
+    names = {name for inputs in FORMULA_INPUTS.values() for name in inputs}
+    # Absolute amounts or unit-free scores despite their names
+    not_fractions = {"fx_rate_local", "us_rate_delta", "rates", "shareholders_equity"}
+    rate_like = {
+        name for name in names - not_fractions
+        if any(word in name.lower() for word in ("rate", "share", "pct", "percent"))
+    }
+    assert rate_like <= FRACTION_INPUTS | PERCENT_PARAMS
+    assert FRACTION_INPUTS <= names
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    calls = []
+
+    def fake_intent(user_text):
+        calls.append(user_text)
+        return "formula", "compound_interest", "FORMULA: compound_interest: P = 5000, r = 0.05, n = 4, t = 2"
+
+    monkeypatch.setattr(intent_detection, "get_formula_intent_from_gemini", fake_intent)
+    return calls
+
+
+def test_parse_user_query_uses_gemini_for_worded_inputs(gemini):
+    query = "Calculate compound interest on principal 5000 at 5% for 2 years compounded 4 times"
+    is_theoretical, formula, params, region = parse_user_query(query, "en")
+    assert gemini == [query]
+    assert (is_theoretical, formula, region) == (False, "compound_interest", "US")
+    assert params == {"P": 5000.0, "r": 0.05, "n": 4.0, "t": 2.0}
+
+
+def test_parse_user_query_answers_explicit_inputs_locally(gemini):
+    result = parse_user_query("compound interest in India, P = 5000, r = 5%, n = 4, t = 2")
+    assert gemini == []
+    assert result == (False, "compound_interest", {"P": 5000.0, "r": 0.05, "n": 4.0, "t": 2.0}, "IN")
+
+
+def test_intent_detection_does_not_import_the_fetch_stack():
+    code = "import sys, intent_detection; print('data_fetcher' in sys.modules, 'econ_compute' in sys.modules)"
+    out = subprocess.run([sys.executable, "-W", "ignore", "-c", code], capture_output=True, text=True,
+                         cwd=os.path.dirname(intent_detection.__file__), check=True).stdout
+    assert out.split() == ["False", "False"]
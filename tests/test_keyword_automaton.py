@@ -0,0 +1,73 @@
+import random
+from keyword_automaton import KeywordAutomaton, KeywordHit
+
+
+def _naive_hits(catalog, text):
+    text = text.lower()
+    hits = set()
+    for label, keywords in catalog.items():
+        for keyword in {k.lower() for k in keywords}:
+            start = text.find(keyword)
+            while start != -1:
+                hits.add(KeywordHit(start, start + len(keyword), keyword, label))
+                start = text.find(keyword, start + 1)
+    return hits
+
+
+def test_matches_naive_search_on_overlapping_keywords():
+    catalog = {
+        "a": ["he", "she", "hers"],
+        "b": ["his", "s", "e"],
+        "c": ["ushers", "her"],
+    }
+    automaton = KeywordAutomaton(catalog)
+    rng = random.Random(7)
+    for _ in range(300):
+        text = "".join(rng.choice("hersiu ") for _ in range(rng.randint(0, 40)))
+        assert set(automaton.find_all(text)) == _naive_hits(catalog, text)
+
+
+def test_case_insensitive_with_positions():
+    automaton = KeywordAutomaton({"compound_interest": ["Compound Interest"]})
+    text = "What is COMPOUND interest?"
+    assert automaton.find_all(text) == [KeywordHit(8, 25, "compound interest", "compound_interest")]
+
+
+def test_unicode_keywords():
+    automaton = KeywordAutomaton({"IN": ["भारत", "india"], "US": ["अमेरिका"]})
+    assert automaton.best("भारत में जीएसटी") == "IN"
+    assert automaton.best("अमेरिका की मुद्रास्फीति") == "US"
+
+
+def test_best_prefers_longest_then_most_specific_keyword():
+    automaton = KeywordAutomaton({
+        "effective_tax_rate": ["effective tax rate", "tax rate"],
+        "get_gst_rate": ["gst", "tax rate"],
+        "compound_interest": ["compound interest", "compound"],
+        "simple_interest": ["simple interest", "simple"],
+    })
+    assert automaton.best("what is the effective tax rate here") == "effective_tax_rate"
+    assert automaton.best("compound interest vs simple") == "compound_interest"
+    # Equally long keywords: the one naming fewer labels wins, then catalog order
+    assert automaton.best("tax rate") == "effective_tax_rate"
+    shared = KeywordAutomaton({"vat": ["vat"], "sales_tax": ["vat", "gst"]})
+    assert shared.best("vat or gst") == "sales_tax"
+    assert automaton.best("nothing relevant") is None
+
+
+def test_ranked_gives_best_hit_per_label_in_rank_order():
+    automaton = KeywordAutomaton({
+        "simple_interest": ["simple interest", "simple"],
+        "compound_interest": ["compound interest", "compound"],
+    })
+    ranked = automaton.ranked("simple or compound interest, simple interest")
+    assert [hit.label for hit in ranked] == ["compound_interest", "simple_interest"]
+    assert ranked[1].keyword == "simple interest" and ranked[1].start == 29
+
+
+def test_matches_intent_detection_catalogs():
+    import intent_detection
+
+    assert intent_detection.detect_intent_from_keywords("calculate the rule of 72 for 6%") == "rule_of_72"
+    assert intent_detection.detect_region("price of fuel in Germany") == "DE"
+    assert intent_detection.detect_region("no place named", "hi") == "IN"
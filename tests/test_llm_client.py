@@ -0,0 +1,214 @@
+import threading
+import time
+
+import pytest
+
+import llm_client
+from llm_client import BATCH, INTERACTIVE, LLMClient, QueueFullError, TokenBucket
+
+FAST = dict(requests_per_minute=60_000, tokens_per_minute=60_000_000)
+
+
+class QuotaError(Exception):
+    code = 429
+
+
+def _wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.005)
+
+
+def _blocker(client, priority=INTERACTIVE):
+    """Occupy one slot until the returned event is set."""
+    started, release = threading.Event(), threading.Event()
+
+    def _hold():
+        started.set()
+        release.wait(5)
+        return "held"
+
+    future = client.submit(_hold, priority=priority)
+    assert started.wait(2)
+    return release, future
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_paces_at_rate(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(llm_client.time, "monotonic", clock)
+    bucket = TokenBucket(rate_per_minute=60, burst_seconds=10)  # 1/s, capacity 10
+    assert bucket.wait_time(10) == 0
+    bucket.take(10)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+    clock.now += 0.5
+    assert bucket.wait_time(1) == pytest.approx(0.5)
+    clock.now += 100
+    assert bucket.level < 10 and bucket.wait_time(1) == 0
+    assert bucket.level == 10  # refill is capped at the capacity
+
+
+def test_oversized_request_leaves_bucket_in_debt(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(llm_client.time, "monotonic", clock)
+    bucket = TokenBucket(rate_per_minute=600, burst_seconds=1)  # 10/s, capacity 10
+    assert bucket.wait_time(50) == 0  # larger than the capacity, let through when full
+    bucket.take(50)
+    assert bucket.wait_time(1) == pytest.approx(4.1)
+
+
+def test_requests_per_minute_limit_spaces_calls():
+    client = LLMClient(requests_per_minute=600, tokens_per_minute=1e9)  # 10/s, burst of 100
+    client._requests.level = 1  # as if the burst were spent
+    started = time.monotonic()
+    assert [client.call(lambda i=i: i) for i in range(3)] == [0, 1, 2]
+    assert time.monotonic() - started >= 0.15
+
+
+def test_interactive_calls_jump_ahead_of_batch():
+    client = LLMClient(max_concurrency=1, **FAST)
+    release, first = _blocker(client)
+    order = []
+    batch = [client.submit(order.append, f"batch{i}", priority=BATCH) for i in range(2)]
+    interactive = client.submit(order.append, "interactive", priority=INTERACTIVE)
+    release.set()
+    for future in [first, interactive, *batch]:
+        future.result(2)
+    assert order == ["interactive", "batch0", "batch1"]
+
+
+def test_full_queue_fails_fast_and_batch_leaves_room():
+    client = LLMClient(max_queue=5, max_concurrency=1, batch_share=0.4, **FAST)
+    release, first = _blocker(client)
+    queued = [client.submit(lambda: None, priority=BATCH)]
+    with pytest.raises(QueueFullError) as info:
+        client.submit(lambda: None, priority=BATCH)  # batch may hold 2 of the 5 places
+    assert info.value.retry_after >= 1.0
+    queued += [client.submit(lambda: None) for _ in range(3)]
+    with pytest.raises(QueueFullError):
+        client.submit(lambda: None)
+    assert client.rejected == 2
+    release.set()
+    for future in [first, *queued]:
+        future.result(2)
+    assert client.completed == 5
+
+
+def test_quota_errors_are_retried():
+    client = LLMClient(max_retries=3, **FAST)
+    attempts = []
+
+    def _flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise QuotaError("rate limited")
+        return "ok"
+
+    assert client.call(_flaky, timeout=5) == "ok"
+    assert len(attempts) == 3 and client.quota_retries == 2
+
+
+def test_retries_give_up_and_other_errors_are_not_retried():
+    client = LLMClient(max_retries=2, **FAST)
+    calls = []
+
+    def _always_limited():
+        calls.append(1)
+        raise QuotaError("rate limited")
+
+    with pytest.raises(QuotaError):
+        client.call(_always_limited, timeout=5)
+    assert len(calls) == 3
+
+    def _broken():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    calls.clear()
+    with pytest.raises(ValueError):
+        client.call(_broken, timeout=5)
+    assert len(calls) == 1
+    assert client._pending == 0 and client._active == 0
+
+
+def _stream(chunks, log):
+    for chunk in chunks:
+        log.append(chunk)
+        yield chunk
+
+
+def test_stream_holds_its_slot_until_exhausted():
+    client = LLMClient(max_concurrency=1, **FAST)
+    log = []
+    stream = client.stream(_stream, ["a", "b", "c"], log, tokens=10)
+    assert log == ["a"]  # the first chunk is read inside the scheduled call
+
+    waiting = client.submit(log.append, "next")
+    time.sleep(0.05)
+    assert not waiting.done() and client._active == 1 and client._pending == 2
+
+    assert list(stream) == ["a", "b", "c"]
+    waiting.result(2)
+    assert log == ["a", "b", "c", "next"]
+    _wait_until(lambda: client._active == 0)
+    assert client._pending == 0 and client._pending_tokens == 0
+
+
+def test_closing_a_stream_early_releases_its_slot():
+    client = LLMClient(max_concurrency=1, **FAST)
+    log = []
+    with client.stream(_stream, ["a", "b", "c"], log) as stream:
+        assert next(stream) == "a"
+    assert client.call(lambda: "after", timeout=2) == "after"
+    assert log == ["a"]
+    _wait_until(lambda: client._active == 0)
+
+
+def test_abandoned_stream_releases_its_slot():
+    client = LLMClient(max_concurrency=1, **FAST)
+    client.stream(_stream, ["a", "b"], [])  # dropped without reading
+    assert client.call(lambda: "after", timeout=2) == "after"
+
+
+def test_stream_error_releases_its_slot():
+    client = LLMClient(max_concurrency=1, **FAST)
+
+    def _broken_stream():
+        yield "a"
+        raise ConnectionError("reset")
+
+    stream = client.stream(_broken_stream)
+    assert next(stream) == "a"
+    with pytest.raises(ConnectionError):
+        next(stream)
+    assert client.call(lambda: "after", timeout=2) == "after"
+
+
+def test_stream_quota_error_before_first_chunk_is_retried():
+    client = LLMClient(max_retries=3, **FAST)
+    attempts = []
+
+    def _limited_stream():
+        attempts.append(1)
+        if len(attempts) < 2:
+            raise QuotaError("rate limited")
+        yield "a"
+        yield "b"
+
+    assert list(client.stream(_limited_stream, timeout=5)) == ["a", "b"]
+    assert len(attempts) == 2 and client.quota_retries == 1
+
+
+def test_empty_stream():
+    client = LLMClient(max_concurrency=1, **FAST)
+    assert list(client.stream(lambda: iter(()))) == []
+    assert client.call(lambda: "after", timeout=2) == "after"
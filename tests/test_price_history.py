@@ -0,0 +1,70 @@
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from price_history import COLUMNS, PriceHistoryCache, from_day, missing_ranges, merge_ranges, to_day
+
+
+class FakeYahoo:
+    """fetch_history stub: one bar per weekday with Close = epoch day."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, ticker, start_day, end_day):
+        self.calls.append((ticker, start_day, end_day))
+        days = [d for d in range(start_day, end_day) if from_day(d).weekday() < 5]
+        rows = [[d, d + 1, d - 1, d, 1000] for d in days]
+        return np.array(days, dtype=np.int64), np.array(rows, dtype=np.float64).reshape(-1, len(COLUMNS))
+
+
+@pytest.fixture
+def upstream():
+    return FakeYahoo()
+
+
+@pytest.fixture
+def cache(tmp_path, upstream):
+    return PriceHistoryCache(fetch_history=upstream, dirname=str(tmp_path / "prices"))
+
+
+def test_range_helpers():
+    assert merge_ranges([[5, 8], [1, 3], [3, 4], [7, 10]]) == [[1, 4], [5, 10]]
+    assert missing_ranges([[1, 4], [5, 10]], 0, 12) == [(0, 1), (4, 5), (10, 12)]
+    assert missing_ranges([[1, 4]], 2, 3) == []
+    assert to_day("1970-01-02") == 1 and to_day(date(1970, 1, 3)) == 2 and from_day(3) == date(1970, 1, 4)
+
+
+def test_neighbouring_dates_share_one_fetch(cache, upstream):
+    for day in ("2024-03-04", "2024-03-05", "2024-03-06", "2024-11-29"):
+        assert cache.get_close("AAPL", day) == to_day(day)
+    assert upstream.calls == [("AAPL", to_day("2024-01-01"), to_day("2025-01-01"))]
+    assert cache.get_close("AAPL", "2024-03-09") is None  # Saturday, still no fetch
+    assert len(upstream.calls) == 1
+
+
+def test_coverage_survives_a_new_instance(tmp_path, cache, upstream):
+    cache.get_close("AAPL", "2023-06-01")
+    reopened = PriceHistoryCache(fetch_history=upstream, dirname=str(tmp_path / "prices"))
+    assert reopened.get_close("AAPL", "2023-06-02") == to_day("2023-06-02")
+    assert len(upstream.calls) == 1
+
+
+def test_current_year_stops_at_today(cache, upstream):
+    today = date.today()
+    earlier = max(date(today.year, 1, 1), today - timedelta(days=3))
+    cache.get_close("MSFT", earlier)
+    cache.get_close("MSFT", max(date(today.year, 1, 1), today - timedelta(days=1)))
+    assert upstream.calls == [("MSFT", to_day(date(today.year, 1, 1)), max(to_day(today), to_day(earlier) + 1))]
+    # Today's bar is never covered, so asking for today fetches only today
+    cache.get_close("MSFT", today)
+    assert upstream.calls[-1][1:] == (to_day(today), to_day(today) + 1)
+
+
+def test_get_range_fetches_only_uncovered_days(cache, upstream):
+    days, rows = cache.get_range("IBM", "2022-01-03", "2022-01-08")
+    assert list(days) == list(range(to_day("2022-01-03"), to_day("2022-01-08")))
+    assert list(rows[:, COLUMNS.index("Close")]) == list(days)
+    cache.get_range("IBM", "2022-01-05", "2022-01-12")
+    assert upstream.calls[1][1:] == (to_day("2022-01-08"), to_day("2022-01-12"))
+    days, _ = cache.get_range("IBM", "2022-01-01", "2022-01-12")
+    assert len(days) == 7 and upstream.calls[2][1:] == (to_day("2022-01-01"), to_day("2022-01-03"))
@@ -0,0 +1,137 @@
+import json
+from datetime import date
+import pytest
+import requests
+import record_replay
+from record_replay import FixtureStore, RecordedError, recordable, recordable_stream, today_relative_day
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = FixtureStore(str(tmp_path))
+    monkeypatch.setattr(record_replay, "_store", store)
+    return store
+
+
+def _set_mode(monkeypatch, mode):
+    monkeypatch.setattr(record_replay, "MODE", mode)
+
+
+def _set_today(monkeypatch, today):
+    class FixedDate(date):
+        @classmethod
+        def today(cls):
+            return today
+
+    monkeypatch.setattr(record_replay, "date_cls", FixedDate)
+
+
+def _epoch_day(value):
+    return (value - date(1970, 1, 1)).days
+
+
+def test_results_replay_from_json_fixtures(store, tmp_path, monkeypatch):
+    upstream = iter([{"price": 1.5}, {"price": 2.5}])
+
+    @recordable("quotes")
+    def fetch(symbol):
+        return next(upstream)
+
+    _set_mode(monkeypatch, "record")
+    assert fetch("AAPL") == {"price": 1.5}
+    assert fetch("AAPL") == {"price": 2.5}
+
+    # Plain, reviewable JSON on disk
+    with open(tmp_path / "quotes.json", encoding="utf-8") as f:
+        recorded = json.load(f)
+    assert [entry["value"] for entry in recorded[json.dumps([["AAPL"], {}])]] == [{"price": 1.5}, {"price": 2.5}]
+
+    _set_mode(monkeypatch, "replay")
+    replayed = FixtureStore(str(tmp_path))
+    monkeypatch.setattr(record_replay, "_store", replayed)
+    assert [fetch("AAPL") for _ in range(3)] == [{"price": 1.5}, {"price": 2.5}, {"price": 1.5}]
+    with pytest.raises(record_replay.FixtureMissingError):
+        fetch("MSFT")
+
+
+def test_recorded_errors_are_raised_again(store, monkeypatch):
+    @recordable("http")
+    def fetch(url):
+        raise requests.ConnectionError("connection reset")
+
+    _set_mode(monkeypatch, "record")
+    with pytest.raises(requests.ConnectionError):
+        fetch("https://example.org")
+
+    _set_mode(monkeypatch, "replay")
+    with pytest.raises(requests.ConnectionError, match="connection reset"):
+        fetch("https://example.org")
+
+
+def test_unknown_error_class_is_not_imported():
+    error = record_replay.decode_error({"module": "not_a_loaded_module", "type": "Boom", "args": ["x"]})
+    assert isinstance(error, RecordedError)
+
+
+def test_encode_decode_hooks(store, monkeypatch):
+    @recordable("fx", encode=lambda table: {str(k): v for k, v in table.items()},
+                decode=lambda table: {int(k): v for k, v in table.items()})
+    def fetch():
+        return {19000: {"USD": 1.1}}
+
+    _set_mode(monkeypatch, "record")
+    fetch()
+    _set_mode(monkeypatch, "replay")
+    assert fetch() == {19000: {"USD": 1.1}}
+
+
+def test_ranges_up_to_today_replay_on_later_days(store, monkeypatch):
+    calls = []
+
+    @recordable("history", key=lambda start_day, end_day: [start_day, today_relative_day(end_day)])
+    def fetch(start_day, end_day):
+        calls.append((start_day, end_day))
+        return [start_day, end_day]
+
+    start = _epoch_day(date(2026, 1, 1))
+    _set_mode(monkeypatch, "record")
+    _set_today(monkeypatch, date(2026, 10, 16))
+    fetch(start, _epoch_day(date(2026, 10, 17)))
+    fetch(start, _epoch_day(date(2026, 3, 1)))
+
+    _set_mode(monkeypatch, "replay")
+    _set_today(monkeypatch, date(2026, 10, 20))
+    assert fetch(start, _epoch_day(date(2026, 10, 21))) == [start, _epoch_day(date(2026, 10, 17))]
+    # Closed ranges in the past keep their exact end
+    assert fetch(start, _epoch_day(date(2026, 3, 1))) == [start, _epoch_day(date(2026, 3, 1))]
+    assert len(calls) == 2
+
+
+def test_streams_replay_chunks(store, monkeypatch):
+    @recordable_stream("stream")
+    def stream(prompt):
+        yield "Hello, "
+        yield "world"
+
+    _set_mode(monkeypatch, "record")
+    assert "".join(stream("hi")) == "Hello, world"
+    _set_mode(monkeypatch, "replay")
+    assert list(stream("hi")) == ["Hello, ", "world"]
+
+
+def test_http_fixtures_store_text_bodies(store, monkeypatch):
+    import http_client
+
+    response = requests.Response()
+    response.status_code = 200
+    response._content = '{"rates": {"EUR": 0.9}}'.encode("utf-8")
+    response.url = "https://open.er-api.com/v6/latest/USD"
+    monkeypatch.setattr(http_client.get_session(), "request", lambda method, url, **kwargs: response)
+
+    _set_mode(monkeypatch, "record")
+    http_client.get("https://open.er-api.com/v6/latest/USD")
+    entry = next(iter(store._load("http").values()))[0]
+    assert entry["value"]["text"] == '{"rates": {"EUR": 0.9}}'
+
+    _set_mode(monkeypatch, "replay")
+    assert http_client.get("https://open.er-api.com/v6/latest/USD").json() == {"rates": {"EUR": 0.9}}
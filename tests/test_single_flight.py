@@ -0,0 +1,101 @@
+import threading
+import time
+from single_flight import SingleFlight, coalesce
+
+
+def _run_concurrently(fn, count):
+    results, errors = [], []
+    start = threading.Barrier(count)
+
+    def worker():
+        start.wait()
+        try:
+            results.append(fn())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flights = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return 42
+
+    results, errors = _run_concurrently(lambda: flights.do("key", fetch), 8)
+    assert results == [42] * 8 and not errors
+    assert len(calls) == 1
+    assert flights.executed == 1 and flights.coalesced == 7
+
+
+def test_error_is_shared_and_not_remembered():
+    flights = SingleFlight()
+    attempts = []
+
+    def fetch():
+        attempts.append(1)
+        time.sleep(0.2)
+        raise ConnectionError("upstream down")
+
+    results, errors = _run_concurrently(lambda: flights.do("key", fetch), 4)
+    assert not results and len(errors) == 4
+    assert all(isinstance(e, ConnectionError) for e in errors)
+    assert len(attempts) == 1
+
+    # The failed call is gone; the next caller runs again
+    assert flights.do("key", lambda: "ok") == "ok"
+
+
+def test_coalesce_keys_on_normalized_arguments():
+    flights = SingleFlight()
+    calls = []
+
+    @coalesce(group=flights)
+    def quote(symbol, currency="USD"):
+        calls.append((symbol, currency))
+        time.sleep(0.2)
+        return symbol.strip()
+
+    results, _ = _run_concurrently(lambda: quote("  AAPL "), 3)
+    results += _run_concurrently(lambda: quote("AAPL", currency="USD"), 1)[0]
+    assert len(calls) == 2  # the second batch ran after the first finished
+    assert set(results) == {"AAPL"}
+
+
+def test_different_arguments_are_not_coalesced():
+    flights = SingleFlight()
+    seen = []
+    gate = threading.Barrier(2, timeout=5)
+
+    @coalesce(group=flights)
+    def quote(symbol):
+        seen.append(symbol)
+        gate.wait()  # both calls must be in flight at once
+        return symbol
+
+    threads = [threading.Thread(target=quote, args=(s,)) for s in ("AAPL", "MSFT")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(seen) == ["AAPL", "MSFT"]
+
+
+def test_unhashable_arguments_bypass_coalescing():
+    flights = SingleFlight()
+
+    @coalesce(group=flights)
+    def total(values):
+        return sum(values)
+
+    assert total({1, 2, 3}) == 6
+    assert flights.executed == 0
@@ -0,0 +1,91 @@
+import types
+import pytest
+import requests
+import data_fetcher
+from ticker_resolver import TickerInfo, TickerResolver
+
+
+def _response(status):
+    return types.SimpleNamespace(status_code=status)
+
+
+def _http_error(status):
+    return requests.HTTPError(f"{status} error", response=_response(status))
+
+
+def _resolver(tmp_path, upstream):
+    return TickerResolver(resolve_upstream=upstream, filename=str(tmp_path / "tickers.sqlite3"))
+
+
+def test_confirmed_miss_is_cached(tmp_path):
+    calls = []
+
+    def upstream(name):
+        calls.append(name)
+        return None
+
+    resolver = _resolver(tmp_path, upstream)
+    assert resolver.resolve("Nope Corp") is None
+    assert resolver.resolve("nope  corp") is None
+    assert calls == ["Nope Corp"]
+
+
+def test_upstream_error_is_not_cached(tmp_path):
+    outcomes = [requests.ConnectionError("network down"), TickerInfo("AAPL", "USD", "NMS")]
+
+    def upstream(name):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    resolver = _resolver(tmp_path, upstream)
+    with pytest.raises(requests.ConnectionError):
+        resolver.resolve("AAPL")
+    assert resolver.resolve("AAPL") == TickerInfo("AAPL", "USD", "NMS")
+
+
+@pytest.fixture
+def yahoo(monkeypatch):
+    """Point yf.Ticker(...).info at a per-test outcome: a dict, or an exception to raise."""
+    state = {"info": {}}
+
+    class FakeTicker:
+        def __init__(self, symbol):
+            self.symbol = symbol
+
+        @property
+        def info(self):
+            if isinstance(state["info"], Exception):
+                raise state["info"]
+            return state["info"]
+
+    monkeypatch.setattr(data_fetcher.yf, "Ticker", FakeTicker)
+    return state
+
+
+@pytest.mark.parametrize("error", [
+    requests.ConnectionError("reset by peer"),
+    requests.Timeout("read timed out"),
+    _http_error(429),
+    _http_error(503),
+    data_fetcher.yf.exceptions.YFRateLimitError(),
+])
+def test_transient_yahoo_errors_propagate(yahoo, monkeypatch, error):
+    yahoo["info"] = error
+    monkeypatch.setattr(data_fetcher, "_search_ticker", lambda name: None)
+    with pytest.raises(type(error)):
+        data_fetcher._resolve_ticker_upstream("AAPL")
+    assert data_fetcher.is_valid_ticker("AAPL") is False
+
+
+def test_unknown_symbol_falls_back_to_search(yahoo, monkeypatch):
+    yahoo["info"] = _http_error(404)
+    monkeypatch.setattr(data_fetcher, "_search_ticker", lambda name: None)
+    assert data_fetcher._ticker_info("ZZZZ") is None
+    assert data_fetcher._resolve_ticker_upstream("ZZZZ") is None
+
+
+def test_listed_symbol_resolves(yahoo):
+    yahoo["info"] = {"currency": "USD", "exchange": "NMS", "regularMarketPrice": 1.0}
+    assert data_fetcher._resolve_ticker_upstream("aapl") == TickerInfo("AAPL", "USD", "NMS")
@@ -0,0 +1,153 @@
+# ticker_resolver.py
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, namedtuple
+import storage
+
+# ----------------------------
+# Company name / symbol -> ticker resolution index
+# ----------------------------
+
+TickerInfo = namedtuple("TickerInfo", ["ticker", "currency", "exchange"])
+
+
+def normalize_query(name: str) -> str:
+    return " ".join(name.strip().lower().split())
+
+
+class TickerResolver:
+    """
+    Resolves a company name or symbol to (ticker, native currency, exchange)
+    through an in-memory LRU, then a persistent SQLite tier, then the upstream
+    resolver. Unknown names are cached negatively for a shorter TTL.
+    """
+
+    def __init__(
+        self,
+        resolve_upstream,
+        filename: str = "tickers.sqlite3",
+        max_memory_entries: int = 2048,
+        ttl_seconds: float = 30 * 86400,
+        negative_ttl_seconds: float = 86400,
+    ):
+        # resolve_upstream(name) -> TickerInfo | None
+        self._resolve_upstream = resolve_upstream
+        self.max_memory_entries = max_memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._memory = OrderedDict()  # query -> (resolved_at, TickerInfo | None)
+        self._lock = threading.Lock()
+        self._conn = storage.connect(filename)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS resolutions (
+                query TEXT PRIMARY KEY,
+                ticker TEXT,
+                currency TEXT,
+                exchange TEXT,
+                resolved_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def _expired(self, resolved_at: float, info) -> bool:
+        ttl = self.ttl_seconds if info is not None else self.negative_ttl_seconds
+        return time.time() - resolved_at >= ttl
+
+    def _remember(self, query: str, resolved_at: float, info):
+        self._memory[query] = (resolved_at, info)
+        self._memory.move_to_end(query)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _cached(self, query: str):
+        """Return (hit, info) from memory or disk."""
+        with self._lock:
+            entry = self._memory.get(query)
+            if entry is not None and not self._expired(*entry):
+                self._memory.move_to_end(query)
+                return True, entry[1]
+
+            row = self._conn.execute(
+                "SELECT ticker, currency, exchange, resolved_at FROM resolutions WHERE query = ?",
+                (query,),
+            ).fetchone()
+            if row is None:
+                return False, None
+            info = TickerInfo(row[0], row[1], row[2]) if row[0] else None
+            if self._expired(row[3], info):
+                return False, None
+            self._remember(query, row[3], info)
+            return True, info
+
+    def store(self, name: str, info):
+        """
+        Record a resolution (or a negative result when info is None) in both tiers.
+        """
+        query = normalize_query(name)
+        now = time.time()
+        with self._lock:
+            self._remember(query, now, info)
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO resolutions (query, ticker, currency, exchange, resolved_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (query, info.ticker if info else None, info.currency if info else None,
+                     info.exchange if info else None, now),
+                )
+
+    def resolve(self, name: str) -> TickerInfo | None:
+        """
+        Resolve name to a TickerInfo, or None if it is known not to exist.
+        Upstream errors propagate and leave nothing cached.
+        """
+        query = normalize_query(name)
+        hit, info = self._cached(query)
+        if hit:
+            return info
+        info = self._resolve_upstream(name)
+        self.store(name, info)
+        return info
+
+    def resolve_many(self, names, max_workers: int = 8) -> dict:
+        """
+        Resolve several names at once; cache misses go upstream concurrently.
+        Returns {name: TickerInfo | None | Exception}, keeping upstream errors per name.
+        """
+        results = {}
+        misses = []
+        for name in dict.fromkeys(names):
+            hit, info = self._cached(normalize_query(name))
+            if hit:
+                results[name] = info
+            else:
+                misses.append(name)
+
+        def _safe_resolve(name):
+            try:
+                return self.resolve(name)
+            except Exception as e:
+                return e
+
+        if misses:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(misses))) as pool:
+                for name, info in zip(misses, pool.map(_safe_resolve, misses)):
+                    results[name] = info
+        return results
+
+    def invalidate(self, name: str = None):
+        """
+        Forget one name, or every cached resolution when name is None.
+        """
+        with self._lock:
+            with self._conn:
+                if name is None:
+                    self._memory.clear()
+                    self._conn.execute("DELETE FROM resolutions")
+                else:
+                    query = normalize_query(name)
+                    self._memory.pop(query, None)
+                    self._conn.execute("DELETE FROM resolutions WHERE query = ?", (query,))